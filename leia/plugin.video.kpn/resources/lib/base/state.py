@@ -0,0 +1,118 @@
+import json, os, sqlite3, threading, time
+
+from contextlib import contextmanager
+from resources.lib.base.constants import ADDON_PROFILE, STATE_DB, STATE_TIMEOUT
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+_connection = None
+_depth = 0
+_lock = threading.RLock()
+
+def _connect():
+    global _connection
+
+    if not _connection:
+        if not os.path.isdir(ADDON_PROFILE):
+            os.makedirs(ADDON_PROFILE)
+
+        _connection = sqlite3.connect(os.path.join(ADDON_PROFILE, STATE_DB), timeout=STATE_TIMEOUT, isolation_level=None, check_same_thread=False)
+        _connection.execute('PRAGMA journal_mode=WAL')
+        _connection.execute('PRAGMA synchronous=NORMAL')
+        _connection.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated INTEGER NOT NULL)')
+
+    return _connection
+
+def close():
+    global _connection
+
+    with _lock:
+        if _connection:
+            _connection.close()
+            _connection = None
+
+@contextmanager
+def transaction():
+    global _depth
+
+    with _lock:
+        connection = _connect()
+
+        if _depth == 0:
+            connection.execute('BEGIN IMMEDIATE')
+
+        _depth += 1
+
+        try:
+            yield
+        except:
+            _depth -= 1
+
+            if _depth == 0:
+                connection.execute('ROLLBACK')
+
+            raise
+        else:
+            _depth -= 1
+
+            if _depth == 0:
+                connection.execute('COMMIT')
+
+def get(key, default=''):
+    with _lock:
+        row = _connect().execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+
+    return unicode(row[0]) if row and row[0] else unicode(default)
+
+def set(key, value=''):
+    with _lock:
+        _connect().execute('INSERT OR REPLACE INTO state (key, value, updated) VALUES (?, ?, ?)', (key, unicode(value), int(time.time())))
+
+def remove(key):
+    with _lock:
+        _connect().execute('DELETE FROM state WHERE key = ?', (key,))
+
+def compare_and_set(key, expected, value):
+    with transaction():
+        if get(key) != unicode(expected):
+            return False
+
+        set(key, value)
+
+    return True
+
+def getDict(key, default=None):
+    try:
+        return json.loads(get(key))
+    except:
+        return default
+
+def setDict(key, value):
+    set(key, json.dumps(value))
+
+def getInt(key, default=0):
+    try:
+        return int(get(key))
+    except:
+        return default
+
+def setInt(key, value):
+    set(key, int(value))
+
+def claim(key, timeout):
+    now = int(time.time())
+
+    with transaction():
+        if getInt(key) == 1 and getInt(key + 'time') >= now - timeout:
+            return False
+
+        setInt(key, 1)
+        setInt(key + 'time', now)
+
+    return True
+
+def release(key):
+    setInt(key, 0)
@@ -0,0 +1,35 @@
+import os, stat
+
+from resources.lib.base import settings
+
+DEFAULT_UMASK = 0o022
+
+def read_umask():
+    # The umask can only be read by setting it, which races with other threads, so the service does it once at startup
+    umask = os.umask(0)
+    os.umask(umask)
+
+    settings.setInt(key='_umask', value=umask)
+
+def replace_file(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        if os.path.isfile(dst):
+            os.remove(dst)
+
+        os.rename(src, dst)
+
+def set_mode(src, dst):
+    # mkstemp creates files readable by the owner only, keep the mode of the file being replaced
+    try:
+        mode = stat.S_IMODE(os.stat(dst).st_mode)
+    except OSError:
+        umask = settings.getInt(key='_umask', default=-1)
+
+        if umask < 0:
+            umask = DEFAULT_UMASK
+
+        mode = 0o666 & ~umask
+
+    os.chmod(src, mode)
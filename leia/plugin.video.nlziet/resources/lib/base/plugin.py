@@ -1,12 +1,12 @@
-import shutil, sys, time, xbmc, xbmcaddon, xbmcplugin
+import shutil, sys, xbmc, xbmcaddon, xbmcplugin
 
 from functools import wraps
-from resources.lib.base import router, gui, settings, inputstream, signals
-from resources.lib.base.constants import ADDON_ICON, ADDON_FANART, ADDON_ID, ADDON_NAME, ADDON_PROFILE
+from resources.lib.base import router, gui, listing, replay, settings, inputstream, signals
+from resources.lib.base.constants import ADDON_ICON, ADDON_FANART, ADDON_ID, ADDON_NAME, ADDON_PROFILE, EPG_CATCHUP_DAYS
 from resources.lib.base.exceptions import PluginError
-from resources.lib.base.language import _
+from resources.lib.base.language import _, check_language
 from resources.lib.base.log import log
-from resources.lib.base.util import download_epg, download_settings, get_kodi_version
+from resources.lib.base.util import download_epg, download_settings, file_cache, get_kodi_version
 
 try:
     unicode
@@ -35,12 +35,47 @@ def login_required():
         return decorated_function
     return lambda f: decorator(f)
 
+# @plugin.cached_listing(files=['vod.json'])
+def cached_listing(files=()):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            sources = files(**kwargs) if callable(files) else files
+
+            if args or sources is None:
+                return f(*args, **kwargs)
+
+            key = listing.get_key(route=f.__name__, params=kwargs, language=xbmc.getLanguage(xbmc.ISO_639_1), files=['settings.json'] + list(sources))
+
+            try:
+                data = listing.get(key=key)
+            except Exception as e:
+                log.error('Listing cache could not be read: {}'.format(e))
+                data = None
+
+            if data:
+                return _load_folder(data)
+
+            folder = f(*args, **kwargs)
+            data = _dump_folder(folder)
+
+            if data:
+                try:
+                    listing.set(key=key, data=data)
+                except Exception as e:
+                    log.error('Listing cache could not be written: {}'.format(e))
+
+            return folder
+        return decorated_function
+    return lambda f: decorator(f)
+
 # @plugin.route()
 def route(url=None):
     def decorator(f, url):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             item = f(*args, **kwargs)
+            settings.flush()
 
             if isinstance(item, Folder):
                 item.display()
@@ -93,10 +128,23 @@ def reboot():
     _close()
     xbmc.executebuiltin('Reboot')
 
+@signals.on(signals.BEFORE_DISPATCH)
+def _check_language():
+    check_language()
+
 @signals.on(signals.AFTER_DISPATCH)
 def _close():
     signals.emit(signals.ON_CLOSE)
 
+# The service replaces replay.db, an idle invoker must not keep the old file open
+@signals.on(signals.ON_CLOSE)
+def _close_replay():
+    replay.close()
+
+@signals.on(signals.AFTER_DISPATCH)
+def _file_cache_stats():
+    log.debug('File cache: {}'.format(file_cache.stats()))
+
 @route('_settings')
 def _settings(**kwargs):
     _close()
@@ -119,8 +167,7 @@ def _download_epg(**kwargs):
     _close()
 
     try:
-        if settings.getInt('_epgrun') == 0 or settings.getInt('_epgruntime') < (int(time.time()) - 300):
-            download_epg()
+        if download_epg():
             gui.notification(_.DONE_NOREBOOT)
     except:
         pass
@@ -143,8 +190,8 @@ def _set_settings_iptv(**kwargs):
         if IPTV_SIMPLE.getSettingInt("epgPathType") != 0:
             IPTV_SIMPLE.setSettingInt("epgPathType", 0)
 
-        if IPTV_SIMPLE.getSetting("epgPath") != ADDON_PROFILE + "epg.xml":
-            IPTV_SIMPLE.setSetting("epgPath", ADDON_PROFILE + "epg.xml")
+        if IPTV_SIMPLE.getSetting("epgPath") != ADDON_PROFILE + "epg.xml.gz":
+            IPTV_SIMPLE.setSetting("epgPath", ADDON_PROFILE + "epg.xml.gz")
 
         if IPTV_SIMPLE.getSetting("epgTimeShift") != "0":
             IPTV_SIMPLE.setSetting("epgTimeShift", "0")
@@ -168,8 +215,8 @@ def _set_settings_iptv(**kwargs):
             if IPTV_SIMPLE.getSetting("catchupQueryFormat") != 'plugin://' + ADDON_ID + '/?_=play_video&type=program&id={catchup-id}':
                 IPTV_SIMPLE.setSetting("catchupQueryFormat", 'plugin://' + ADDON_ID + '/?_=play_video&type=program&id={catchup-id}')
 
-            if IPTV_SIMPLE.getSettingInt("catchupDays") != 7:
-                IPTV_SIMPLE.setSettingInt("catchupDays", 7)
+            if IPTV_SIMPLE.getSettingInt("catchupDays") != EPG_CATCHUP_DAYS:
+                IPTV_SIMPLE.setSettingInt("catchupDays", EPG_CATCHUP_DAYS)
 
             if IPTV_SIMPLE.getSettingInt("allChannelsCatchupMode") != 1:
                 IPTV_SIMPLE.setSettingInt("allChannelsCatchupMode", 1)
@@ -260,8 +307,67 @@ def _handle():
     except:
         return -1
 
+def _dump_folder(folder):
+    # Only plain, non-empty listings are kept, empty ones may still have to show a dialog
+    if not isinstance(folder, Folder) or not folder.items:
+        return None
+
+    items = []
+
+    for item in folder.items:
+        if not item or item.inputstream:
+            return None
+
+        items.append({
+            'label': item.label,
+            'label2': item.label2,
+            'path': item.path,
+            'playable': item.playable,
+            'info': item.info,
+            'context': item.context,
+            'headers': item.headers,
+            'cookies': item.cookies,
+            'properties': item.properties,
+            'is_folder': item._is_folder,
+            'art': item.art,
+            'video': item.video,
+            'audio': item.audio,
+            'subtitles': item.subtitles,
+            'mimetype': item.mimetype,
+            'cache_key': item.cache_key,
+            'playback_error': item.playback_error,
+        })
+
+    return {
+        'title': folder.title,
+        'content': folder.content,
+        'updateListing': folder.updateListing,
+        'cacheToDisc': folder.cacheToDisc,
+        'sort_methods': folder.sort_methods,
+        'thumb': folder.thumb,
+        'fanart': folder.fanart,
+        'no_items_label': folder.no_items_label,
+        'items': items,
+    }
+
+def _load_folder(data):
+    items = data.pop('items')
+    folder = Folder(**data)
+
+    for row in items:
+        mimetype = row.pop('mimetype')
+        row['context'] = [tuple(context) for context in row['context']]
+
+        item = Item(**row)
+        item.mimetype = mimetype
+        folder.add_items(item)
+
+    return folder
+
 #Plugin.Item()
 class Item(gui.Item):
+    __slots__ = ('cache_key', 'playback_error')
+
     def __init__(self, cache_key=None, playback_error=None, *args, **kwargs):
         super(Item, self).__init__(self, *args, **kwargs)
         self.cache_key = cache_key
@@ -326,12 +432,15 @@ class Folder(object):
                 is_folder = False,
             ))
 
+        listing = []
+
         for item in items:
             item.art['thumb'] = item.art.get('thumb') or self.thumb
             item.art['fanart'] = item.art.get('fanart') or self.fanart
 
-            li = item.get_li()
-            xbmcplugin.addDirectoryItem(handle, item.path, li, item.is_folder)
+            listing.append((item.path, item.get_li(), item.is_folder))
+
+        xbmcplugin.addDirectoryItems(handle, listing, len(listing))
 
         if self.content: xbmcplugin.setContent(handle, self.content)
         if self.title: xbmcplugin.setPluginCategory(handle, self.title)
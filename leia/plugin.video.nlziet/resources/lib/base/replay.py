@@ -0,0 +1,204 @@
+import collections, glob, io, json, os, sqlite3, tempfile, threading, unicodedata
+
+from fuzzywuzzy import utils
+from resources.lib.base import search
+from resources.lib.base.constants import ADDON_PROFILE, REPLAY_DB
+from resources.lib.base.files import replace_file, set_mode
+from resources.lib.base.log import log
+
+_connection = None
+_version = None
+_lock = threading.RLock()
+
+SCHEMA = [
+    'CREATE TABLE titles (letter TEXT NOT NULL, pos INTEGER NOT NULL, title TEXT NOT NULL, data TEXT NOT NULL)',
+    'CREATE TABLE programs (source TEXT NOT NULL, pos INTEGER NOT NULL, id TEXT NOT NULL, channel TEXT, start TEXT, data TEXT NOT NULL)',
+    'CREATE INDEX titles_letter ON titles (letter, pos)',
+    'CREATE INDEX titles_title ON titles (title)',
+    'CREATE INDEX programs_source ON programs (source, pos)',
+    'CREATE INDEX programs_id ON programs (source, id)',
+    'CREATE INDEX programs_channel ON programs (channel, start)',
+    'CREATE INDEX programs_start ON programs (source, start, pos)',
+]
+
+def _load_json(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        return json.load(f, object_pairs_hook=collections.OrderedDict)
+
+def _search_documents(data):
+    for letter in data:
+        for key in sorted(data[letter]):
+            if 'orig' in data[letter][key]:
+                yield 'titles', data[letter][key]['orig'], data[letter][key]
+
+def _title(key, row):
+    try:
+        title = row.get('orig') or key
+    except AttributeError:
+        title = key
+
+    # Accents folded and punctuation dropped, so differently written titles share a row in the index
+    title = u''.join(c for c in unicodedata.normalize('NFKD', title) if not unicodedata.combining(c))
+
+    return utils.full_process(title, force_ascii=True)
+
+def _file_version(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return (stat.st_ino, stat.st_mtime, stat.st_size)
+
+def _start(row):
+    try:
+        return row['s'].split(' ', 1)[0]
+    except:
+        return None
+
+def ingest():
+    path = ADDON_PROFILE + REPLAY_DB
+
+    # The plugin and the service can both ingest, each builds its own temporary file
+    fd, tmp_path = tempfile.mkstemp(prefix='replay', suffix='.tmp', dir=ADDON_PROFILE)
+    os.close(fd)
+
+    connection = sqlite3.connect(tmp_path)
+    titles = {}
+
+    try:
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+        if os.path.isfile(ADDON_PROFILE + 'list_replay.json'):
+            titles = _load_json(ADDON_PROFILE + 'list_replay.json')
+
+            for letter in titles:
+                connection.executemany('INSERT INTO titles (letter, pos, title, data) VALUES (?, ?, ?, ?)', ((letter, pos, _title(key, titles[letter][key]), json.dumps(titles[letter][key])) for pos, key in enumerate(sorted(titles[letter]))))
+
+        for file in glob.glob(ADDON_PROFILE + '*_replay.json'):
+            source = os.path.basename(file)[:-len('_replay.json')]
+
+            if source == 'list':
+                continue
+
+            data = _load_json(file)
+            connection.executemany('INSERT INTO programs (source, pos, id, channel, start, data) VALUES (?, ?, ?, ?, ?, ?)', ((source, pos, id, data[id].get('c'), _start(data[id]), json.dumps(data[id])) for pos, id in enumerate(data)))
+
+        connection.commit()
+    except:
+        connection.close()
+        os.remove(tmp_path)
+        raise
+
+    connection.close()
+    set_mode(tmp_path, path)
+
+    with _lock:
+        close()
+        replace_file(tmp_path, path)
+
+    try:
+        search.update(source='replay', documents=_search_documents(titles))
+    except Exception as e:
+        log.error('Replay search index could not be built: {}'.format(e))
+
+def _connect():
+    global _connection, _version
+
+    path = ADDON_PROFILE + REPLAY_DB
+
+    # Another process may have swapped in a new catalogue, the open connection would keep reading the old file
+    if _connection and _file_version(path) != _version:
+        close()
+
+    if not _connection:
+        if not os.path.isfile(path):
+            if not os.path.isfile(ADDON_PROFILE + 'list_replay.json'):
+                return None
+
+            try:
+                ingest()
+            except Exception as e:
+                log.error('Replay catalogue could not be built: {}'.format(e))
+                return None
+
+        _version = _file_version(path)
+        _connection = sqlite3.connect(path, check_same_thread=False)
+
+    return _connection
+
+def close():
+    global _connection, _version
+
+    with _lock:
+        if _connection:
+            _connection.close()
+            _connection = None
+            _version = None
+
+def _query(query, params=()):
+    with _lock:
+        connection = _connect()
+
+        if not connection:
+            return []
+
+        return connection.execute(query, params).fetchall()
+
+def _iterate(query, params=(), size=100):
+    offset = 0
+
+    while True:
+        rows = _query(query + ' LIMIT ? OFFSET ?', params + (size, offset))
+
+        for row in rows:
+            yield row
+
+        if len(rows) < size:
+            break
+
+        offset += size
+
+def count_titles(character=None):
+    if character is None:
+        rows = _query('SELECT COUNT(*) FROM titles')
+    else:
+        rows = _query('SELECT COUNT(*) FROM titles WHERE letter = ?', (character,))
+
+    return rows[0][0] if rows else 0
+
+def get_titles(character, start=0):
+    for pos, data in _iterate('SELECT pos, data FROM titles WHERE letter = ? AND pos >= ? ORDER BY pos', (character, int(start))):
+        yield pos, json.loads(data, object_pairs_hook=collections.OrderedDict)
+
+def get_programs(source, start=0, start_time=None, end_time=None):
+    if start_time and end_time:
+        query = 'SELECT pos, id, data FROM programs WHERE source = ? AND start >= ? AND start < ? AND pos >= ? ORDER BY pos'
+        params = (source, start_time, end_time, int(start))
+    else:
+        query = 'SELECT pos, id, data FROM programs WHERE source = ? AND pos >= ? ORDER BY pos'
+        params = (source, int(start))
+
+    for pos, id, data in _iterate(query, params):
+        yield pos, id, json.loads(data, object_pairs_hook=collections.OrderedDict)
+
+def get_programs_by_id(source, ids, start=0, size=100):
+    start = int(start)
+
+    for offset in range(start, len(ids), size):
+        chunk = ids[offset:offset + size]
+        rows = dict(_query('SELECT id, data FROM programs WHERE source = ? AND id IN ({})'.format(', '.join('?' * len(chunk))), (source,) + tuple(chunk)))
+
+        for pos, id in enumerate(chunk, offset):
+            if id in rows:
+                yield pos, id, json.loads(rows[id], object_pairs_hook=collections.OrderedDict)
+
+def search_titles(query):
+    if not search.has_source(source='replay') and os.path.isfile(ADDON_PROFILE + 'list_replay.json'):
+        search.update(source='replay', documents=_search_documents(_load_json(ADDON_PROFILE + 'list_replay.json')))
+
+    return search.find(source='replay', query=query)
+
+def has_source(source):
+    return len(_query('SELECT 1 FROM programs WHERE source = ? LIMIT 1', (source,))) > 0
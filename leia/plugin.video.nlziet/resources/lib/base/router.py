@@ -1,6 +1,6 @@
 import sys
 
-from resources.lib.base import signals
+from resources.lib.base import settings, signals
 from resources.lib.base.constants import ADDON_ID
 from resources.lib.base.exceptions import RouterError
 from resources.lib.base.language import _
@@ -12,19 +12,31 @@ except NameError:
     unicode = str
 
 try:
-    from urllib.parse import parse_qsl, urlencode, unquote
+    from urllib.parse import parse_qsl, quote_plus, unquote
 except ImportError:
     from urlparse import parse_qsl, unquote
-    from urllib import urlencode
+    from urllib import quote_plus
 
 _routes = {}
+_urls = {}
 
 # @router.add('_settings', settings)
 def add(url, f):
     if url == None:
         url = f.__name__
+
+    replaced = url in _routes
     _routes[url] = f
 
+    # url_for_func() finds routes by function name, the first route added for a name wins
+    if replaced:
+        _urls.clear()
+
+        for route in _routes:
+            _urls.setdefault(_routes[route].__name__, route)
+    else:
+        _urls.setdefault(f.__name__, url)
+
 # @router.route('_settings')
 def route(url):
     def decorator(f):
@@ -56,11 +68,12 @@ def parse_url(url):
     return function, params
 
 def url_for_func(func, **kwargs):
-    for url in _routes:
-        if _routes[url].__name__ == func.__name__:
-            return build_url(url, **kwargs)
+    url = _urls.get(func.__name__)
+
+    if url == None:
+        raise RouterError(_(_.ROUTER_NO_URL, function_name=func.__name__))
 
-    raise RouterError(_(_.ROUTER_NO_URL, function_name=func.__name__))
+    return build_url(url, **kwargs)
 
 def url_for(func_or_url, **kwargs):
     if callable(func_or_url):
@@ -72,28 +85,42 @@ def build_url(url, addon_id=ADDON_ID, **kwargs):
     kwargs['_'] = url
     is_live = kwargs.pop('_is_live', False)
 
+    # Same result as urlencode(encode_obj(params)) for the flat params used here
     params = []
     for k in sorted(kwargs):
-        if kwargs[k] == None:
+        value = kwargs[k]
+
+        if value == None:
             continue
 
-        try: params.append((k, str(kwargs[k]).encode('utf-8')))
-        except: params.append((k, kwargs[k]))
+        try: value = str(value).encode('utf-8')
+        except: pass
+
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+
+        params.append(quote_plus(str(k)) + '=' + quote_plus(value))
 
     if is_live:
-        params.append(('_l', '.pvr'))
+        params.append('_l=.pvr')
 
-    return 'plugin://{0}/?{1}'.format(addon_id, urlencode(encode_obj(params)))
+    return 'plugin://{0}/?{1}'.format(addon_id, '&'.join(params))
 
 # router.dispatch('?_=_settings')
 def dispatch(url):
-    with signals.throwable():
-        function, params = parse_url(url)
-        signals.emit(signals.BEFORE_DISPATCH)
+    # The language invoker is reused, values written by the service or the settings dialog since the last call must be read again
+    settings.invalidate()
+
+    with settings.batch():
+        with signals.throwable():
+            function, params = parse_url(url)
+            signals.emit(signals.BEFORE_DISPATCH)
+
+            function(**params)
 
-        function(**params)
+        signals.emit(signals.AFTER_DISPATCH)
 
-    signals.emit(signals.AFTER_DISPATCH)
+    log.debug('Settings calls: {}'.format(settings.stats()))
 
 def encode_obj(in_obj):
 
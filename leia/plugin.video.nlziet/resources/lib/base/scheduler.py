@@ -0,0 +1,64 @@
+import random, time
+
+from resources.lib.base import state
+from resources.lib.base.constants import SCHEDULER_BACKOFF, SCHEDULER_JITTER, SCHEDULER_MAX_WAIT
+from resources.lib.base.jobs import run_jobs
+from resources.lib.base.log import log
+
+class Task(object):
+    def __init__(self, name, interval, jobs, jitter=SCHEDULER_JITTER):
+        self.name = name
+        self.interval = interval
+        self.jobs = jobs
+        self.jitter = jitter
+
+class Scheduler(object):
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.schedule = state.getDict(key='_schedule', default={})
+
+    def next_run(self, task, now):
+        timestamp = self.schedule.get(task.name, {}).get('next', 0)
+
+        # Due times beyond one interval were stored under a wrong clock
+        if timestamp > now + task.interval * (1 + task.jitter):
+            return 0
+
+        return timestamp
+
+    def due(self, now=None):
+        now = now or time.time()
+
+        return [task for task in self.tasks if self.next_run(task, now) <= now]
+
+    def wait(self, now=None):
+        now = now or time.time()
+
+        return min(max(min(self.next_run(task, now) for task in self.tasks) - now, 0), SCHEDULER_MAX_WAIT)
+
+    def run(self, extra=None, abort=None):
+        tasks = self.due()
+        jobs = dict((task.name, task.jobs()) for task in tasks)
+
+        run_jobs([job for task in tasks for job in jobs[task.name]] + list(extra or []), abort=abort)
+
+        if abort and abort():
+            return
+
+        now = time.time()
+
+        for task in tasks:
+            entry = self.schedule.setdefault(task.name, {})
+
+            if all(job.ok for job in jobs[task.name]):
+                entry['last'] = now
+                entry['failures'] = 0
+                delay = task.interval
+            else:
+                entry['failures'] = entry.get('failures', 0) + 1
+                delay = min(SCHEDULER_BACKOFF * 2 ** (entry['failures'] - 1), task.interval)
+                log.error('Task {} failed {} time(s), retrying in {}s'.format(task.name, entry['failures'], delay))
+
+            entry['next'] = now + delay + random.uniform(0, task.jitter * delay)
+
+        state.setDict(key='_schedule', value=self.schedule)
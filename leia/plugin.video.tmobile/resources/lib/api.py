@@ -1,11 +1,12 @@
 import os, re, time
 
-from resources.lib.base import gui, settings
+from resources.lib.base import gui, settings, state
 from resources.lib.base.constants import ADDON_ID, ADDON_PROFILE
 from resources.lib.base.exceptions import Error
 from resources.lib.base.log import log
+from resources.lib.base.proxy import register_stream
 from resources.lib.base.session import Session
-from resources.lib.base.util import check_key, combine_playlist, get_credentials, set_credentials, write_file
+from resources.lib.base.util import check_key, combine_playlist, get_credentials, get_local_images, set_credentials, write_file, write_playlist
 from resources.lib.constants import CONST_BASE_URL
 from resources.lib.language import _
 
@@ -19,7 +20,7 @@ class APIError(Error):
 
 class API(object):
     def new_session(self, force=False, channels=False):
-        cookies = settings.get(key='_cookies')
+        cookies = state.get(key='_cookies')
 
         if len(cookies) > 0 and force == False:
             self._session = Session(cookies_key='_cookies')
@@ -46,7 +47,7 @@ class API(object):
         self.login(username=username, password=password, channels=channels)
 
     def login(self, username, password, channels=False):
-        settings.remove(key='_cookies')
+        state.remove(key='_cookies')
         self._session = Session(cookies_key='_cookies')
 
         login_url = '{base_url}/inloggen'.format(base_url=CONST_BASE_URL)
@@ -99,7 +100,7 @@ class API(object):
         self.logged_in = True
 
     def clear_session(self):
-        settings.remove(key='_cookies')
+        state.remove(key='_cookies')
 
         try:
             self._session.clear_cookies()
@@ -111,20 +112,26 @@ class API(object):
 
         write_file(file="channels.json", data=channels, isJSON=True)
 
-        data = u'#EXTM3U\n'
+        images = get_local_images()
+        data = []
 
         for row in channels:
-            channeldata = self.get_channel_data(rows=channels, row=row)
+            channeldata = self.get_channel_data(rows=channels, row=row, images=images)
             path = 'plugin://{addonid}/?_=play_video&channel={channel}&type=channel&_l=.pvr'.format(addonid=ADDON_ID, channel=channeldata['channel_id'])
-            data += u'#EXTINF:-1 tvg-id="{id}" tvg-chno="{channel}" tvg-name="{name}" tvg-logo="{logo}" group-title="TV" radio="false",{name}\n{path}\n'.format(id=channeldata['channel_id'], channel=channeldata['channel_number'], name=channeldata['label'], logo=channeldata['station_image_large'], path=path)
+            data.append(u'#EXTINF:-1 tvg-id="{id}" tvg-chno="{channel}" tvg-name="{name}" tvg-logo="{logo}" group-title="TV" radio="false",{name}\n{path}\n'.format(id=channeldata['channel_id'], channel=channeldata['channel_number'], name=channeldata['label'], logo=channeldata['station_image_large'], path=path))
 
-        write_file(file="tv.m3u8", data=data, isJSON=False)
-        combine_playlist()
+        write_playlist(file="tv.m3u8", entries=data)
 
-    def get_channel_data(self, rows, row):
-        path = ADDON_PROFILE + os.sep + "images" + os.sep + str(rows[row]['id']) + ".png"
+        return combine_playlist()
 
-        if os.path.isfile(path):
+    def get_channel_data(self, rows, row, images=None):
+        if images is None:
+            images = get_local_images()
+
+        file = str(rows[row]['id']) + ".png"
+        path = ADDON_PROFILE + os.sep + "images" + os.sep + file
+
+        if file in images:
             image = path
         else:
             image = rows[row]['logos']['guide']
@@ -214,9 +221,8 @@ class API(object):
         self.download(url=eventsink_init_url, type="post", code=None, data=session_post_data, json_data=True, data_return=False, return_json=False, retry=False, check_data=False)
 
         real_url = "{hostscheme}://{hostname}".format(hostscheme=urlparse(path).scheme, hostname=urlparse(path).hostname)
-        proxy_url = "http://127.0.0.1:{proxy_port}".format(proxy_port=settings.get(key='_proxyserver_port'))
+        proxy_url = register_stream(hostname=real_url)
 
-        settings.set(key='_stream_hostname', value=real_url)
         path = path.replace(real_url, proxy_url)
 
         playdata = {'path': path, 'license': license, 'token': token, 'sessionid': sessionid, 'info': info}
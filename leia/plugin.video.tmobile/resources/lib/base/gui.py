@@ -3,6 +3,7 @@ import sys, traceback, xbmc, xbmcgui
 from contextlib import contextmanager
 from resources.lib.base.constants import ADDON_ID, ADDON_NAME, ADDON_ICON
 from resources.lib.base.language import _
+from resources.lib.base.util import get_kodi_version
 
 try:
     unicode
@@ -85,13 +86,10 @@ def yes_no(message, heading=None, autoclose=120000, **kwargs):
 
     return xbmcgui.Dialog().yesno(heading, message, **kwargs)
 
-def get_kodi_version():
-    try:
-        return int(xbmc.getInfoLabel("System.BuildVersion").split('.')[0])
-    except:
-        return 0
-
 class Item(object):
+    __slots__ = ('id', 'label', 'label2', 'path', 'info', 'playable', 'context', 'headers', 'cookies', 'properties',
+        'art', 'video', 'audio', 'subtitles', 'inputstream', 'mimetype', '_is_folder')
+
     def __init__(self, id=None, label='', label2='', path=None, playable=False, info=None, context=None,
             headers=None, cookies=None, properties=None, is_folder=None, art=None, inputstream=None,
             video=None, audio=None, subtitles=None):
@@ -123,6 +121,9 @@ class Item(object):
         self._is_folder = value
 
     def get_url_headers(self, only_user_agent=False):
+        if not self.headers and not self.cookies:
+            return ''
+
         string = ''
 
         for key in self.headers:
@@ -0,0 +1,107 @@
+import threading, time
+
+from resources.lib.base.constants import JOBS_TIMEOUT, JOBS_WORKERS
+from resources.lib.base.log import log
+
+_stuck = []
+
+class Job(object):
+    def __init__(self, func, after=None, timeout=JOBS_TIMEOUT):
+        self.func = func
+        self.name = func.__name__
+        self.after = tuple(after or ())
+        self.timeout = timeout
+        self.ok = None
+        self.started = None
+        self.thread = None
+
+    def start(self, wake):
+        def run():
+            try:
+                self.func()
+                self.ok = True
+            except Exception as e:
+                self.ok = False
+                log.error('Job {} failed: {}'.format(self.name, e))
+            finally:
+                wake.set()
+
+        self.started = time.time()
+        self.thread = threading.Thread(target=run, name=self.name)
+        self.thread.daemon = True
+        self.thread.start()
+
+def run_jobs(jobs, workers=JOBS_WORKERS, abort=None):
+    global _stuck
+
+    funcs = set(job.func for job in jobs)
+    pending = list(jobs)
+    running = []
+    done = set()
+    dropped = set()
+    wake = threading.Event()
+    start = time.time()
+    blocked = None
+
+    while pending or running:
+        if abort and abort():
+            log.debug('Jobs aborted: {}'.format(', '.join(job.name for job in pending + running)))
+            return False
+
+        wake.clear()
+        now = time.time()
+
+        # Timed out threads cannot be stopped, they keep holding a worker until they exit, also across runs
+        _stuck = [job for job in _stuck if job.thread.is_alive()]
+
+        for job in list(running):
+            if not job.thread.is_alive():
+                running.remove(job)
+                done.add(job.func)
+                log.debug('Job {} finished in {:.2f}s'.format(job.name, now - job.started))
+            elif now - job.started > job.timeout:
+                running.remove(job)
+                _stuck.append(job)
+                dropped.add(job.func)
+                job.ok = False
+                log.error('Job {} timed out after {}s'.format(job.name, job.timeout))
+
+        changed = True
+
+        while changed:
+            changed = False
+
+            for job in list(pending):
+                after = [func for func in job.after if func in funcs]
+
+                if any(func in dropped for func in after):
+                    pending.remove(job)
+                    dropped.add(job.func)
+                    job.ok = False
+                    changed = True
+                    log.error('Job {} skipped'.format(job.name))
+                elif len(running) + len(_stuck) < workers and all(func in done for func in after):
+                    pending.remove(job)
+                    running.append(job)
+                    job.start(wake)
+
+        if pending and not running and not _stuck:
+            log.error('Jobs not runnable: {}'.format(', '.join(job.name for job in pending)))
+            return False
+
+        # Only timed out threads hold the workers, wait a while for them to exit but do not spin forever
+        if pending and not running:
+            if blocked is None:
+                blocked = now
+            elif now - blocked > max(job.timeout for job in pending):
+                log.error('Jobs blocked by timed out jobs {}: {}'.format(', '.join(job.name for job in _stuck), ', '.join(job.name for job in pending)))
+                return False
+        else:
+            blocked = None
+
+        if running or pending:
+            wake.wait(2 if blocked else 0.5)
+
+    log.debug('Jobs finished in {:.2f}s'.format(time.time() - start))
+
+    return not dropped
@@ -0,0 +1,187 @@
+from resources.lib.base.log import log
+from resources.lib.base.util import set_duration
+from xml.etree import ElementTree
+from xml.parsers import expat
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+def local_name(tag):
+    if tag is ElementTree.Comment:
+        return ''
+
+    return tag.rsplit(':', 1)[-1]
+
+class ManifestFilter(object):
+    tags = ()
+
+    def apply(self, name, elem, parent):
+        return False
+
+class DropCodecs(ManifestFilter):
+    tags = ('Representation', 'AdaptationSet')
+
+    def __init__(self, codecs):
+        self.codecs = tuple(codec.lower() for codec in codecs)
+        self._emptied = set()
+
+    def matches(self, elem):
+        return elem.get('codecs', '').lower().startswith(self.codecs)
+
+    def apply(self, name, elem, parent):
+        if name == 'Representation':
+            if self.matches(elem):
+                self._emptied.add(id(parent))
+                parent.remove(elem)
+                return True
+
+            return False
+
+        emptied = id(elem) in self._emptied
+        self._emptied.discard(id(elem))
+
+        if self.matches(elem) or (emptied and not any(local_name(child.tag) == 'Representation' for child in elem)):
+            parent.remove(elem)
+            return True
+
+        return False
+
+class LimitRepresentations(ManifestFilter):
+    tags = ('AdaptationSet',)
+
+    def __init__(self, max_bandwidth=0, max_height=0):
+        self.max_bandwidth = max_bandwidth or 0
+        self.max_height = max_height or 0
+
+    def exceeds(self, elem, parent):
+        try:
+            if self.max_bandwidth and int(elem.get('bandwidth', 0)) > self.max_bandwidth:
+                return True
+
+            if self.max_height and int(elem.get('height') or parent.get('height') or 0) > self.max_height:
+                return True
+        except ValueError:
+            pass
+
+        return False
+
+    def apply(self, name, elem, parent):
+        representations = [child for child in elem if local_name(child.tag) == 'Representation']
+        remove = [child for child in representations if self.exceeds(child, elem)]
+
+        if remove and len(remove) == len(representations):
+            remove.remove(min(remove, key=lambda child: int(child.get('bandwidth', 0) or 0)))
+
+        for child in remove:
+            elem.remove(child)
+
+        return False
+
+class SetBaseURL(ManifestFilter):
+    tags = ('MPD',)
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def apply(self, name, elem, parent):
+        base_urls = [child for child in elem if local_name(child.tag) == 'BaseURL']
+
+        if base_urls:
+            for base_url in base_urls:
+                base_url.text = urljoin(self.base_url, (base_url.text or '').strip())
+        else:
+            index = 0
+
+            for child in elem:
+                if local_name(child.tag) != 'ProgramInformation':
+                    break
+
+                index += 1
+
+            base_url = ElementTree.Element(elem.tag[:-len(name)] + 'BaseURL')
+            base_url.text = self.base_url
+            elem.insert(index, base_url)
+
+        return False
+
+def get_base_url(url):
+    return url.split('?', 1)[0].rsplit('/', 1)[0] + '/'
+
+def rewrite_manifest(xml, duration=0, add_duration=0, filters=None):
+    # Builds the whole document tree, it only pays off over the regex passes when filters are set
+    xml = set_duration(xml=xml, duration=duration, add_duration=add_duration)
+    filters = [manifest_filter for manifest_filter in (filters or []) if manifest_filter]
+
+    if not filters:
+        return xml
+
+    dispatch = {}
+
+    for manifest_filter in filters:
+        for tag in manifest_filter.tags:
+            dispatch.setdefault(tag, []).append(manifest_filter)
+
+    builder = ElementTree.TreeBuilder()
+    stack = []
+    bounds = []
+
+    def start(tag, attributes):
+        if not stack:
+            bounds.append(parser.CurrentByteIndex)
+
+        stack.append(builder.start(tag, dict(zip(attributes[::2], attributes[1::2]))))
+
+    def end(tag):
+        elem = builder.end(tag)
+        stack.pop()
+        name = local_name(tag)
+
+        if not stack:
+            bounds.append(parser.CurrentByteIndex)
+
+        for manifest_filter in dispatch.get(name, []):
+            if manifest_filter.apply(name, elem, stack[-1] if stack else None):
+                break
+
+    def comment(text):
+        # Comments outside the root element are kept with the prolog and epilog
+        if stack:
+            builder.start(ElementTree.Comment, {})
+            builder.data(text)
+            builder.end(ElementTree.Comment)
+
+    try:
+        data = xml.encode('utf-8')
+
+        # Without namespace processing tags keep their prefixes and the xmlns attributes pass through as they are
+        parser = expat.ParserCreate()
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = builder.data
+        parser.CommentHandler = comment
+        parser.Parse(data, True)
+        root = builder.close()
+
+        try:
+            body = ElementTree.tostring(root, encoding='unicode')
+        except LookupError:
+            body = unicode(ElementTree.tostring(root, encoding='utf-8').decode('utf-8'))
+
+        # The XML declaration, doctype and surrounding comments are copied from the original document
+        prolog = data[:bounds[0]].decode('utf-8')
+        epilog = data[data.index(b'>', bounds[1]) + 1:].decode('utf-8')
+
+        return prolog + body + epilog
+    except Exception as e:
+        log.error('Manifest could not be rewritten: {}'.format(e))
+
+    return xml
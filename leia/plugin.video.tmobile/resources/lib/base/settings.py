@@ -1,5 +1,6 @@
-import json, xbmcaddon
+import json, threading, xbmcaddon
 
+from contextlib import contextmanager
 from resources.lib.base.constants import ADDON_ID
 
 try:
@@ -7,8 +8,66 @@ try:
 except NameError:
     unicode = str
 
+_addon = None
+_cache = {}
+_pending = {}
+_batch = 0
+_calls = {'addon': 0, 'get': 0, 'set': 0}
+_lock = threading.RLock()
+
+def _get_addon():
+    global _addon
+
+    if not _addon:
+        _calls['addon'] += 1
+        _addon = xbmcaddon.Addon(ADDON_ID)
+
+    return _addon
+
 def open():
-    xbmcaddon.Addon(ADDON_ID).openSettings()
+    flush()
+    _get_addon().openSettings()
+    invalidate()
+
+def invalidate():
+    global _addon
+
+    with _lock:
+        _addon = None
+        _cache.clear()
+
+def flush():
+    with _lock:
+        if not _pending:
+            return
+
+        addon = _get_addon()
+
+        for key in _pending:
+            _calls['set'] += 1
+            addon.setSetting(key, _pending[key])
+
+        _pending.clear()
+
+@contextmanager
+def batch():
+    global _batch
+
+    with _lock:
+        _batch += 1
+
+    try:
+        yield
+    finally:
+        with _lock:
+            _batch -= 1
+
+            if _batch == 0:
+                flush()
+
+def stats():
+    with _lock:
+        return dict(_calls, cached=len(_cache), pending=len(_pending))
 
 def getDict(key, default=None):
     try:
@@ -52,10 +111,29 @@ def setBool(key, value=True):
     set(key, 'true' if value else 'false')
 
 def get(key, default=''):
-    return unicode(xbmcaddon.Addon(ADDON_ID).getSetting(key)) or unicode(default)
+    with _lock:
+        if key in _pending:
+            value = _pending[key]
+        elif key in _cache:
+            value = _cache[key]
+        else:
+            _calls['get'] += 1
+            value = unicode(_get_addon().getSetting(key))
+            _cache[key] = value
+
+    return value or unicode(default)
 
 def set(key, value=''):
-    xbmcaddon.Addon(ADDON_ID).setSetting(key, str(value))
+    value = str(value)
+
+    with _lock:
+        _cache[key] = value
+
+        if _batch > 0:
+            _pending[key] = value
+        else:
+            _calls['set'] += 1
+            _get_addon().setSetting(key, value)
 
 FRESH = getBool('_fresh', True)
 if FRESH:
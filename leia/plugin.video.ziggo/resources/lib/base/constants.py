@@ -16,8 +16,67 @@ ADDON_ICON = ADDON.getAddonInfo('icon')
 ADDON_FANART = ADDON.getAddonInfo('fanart')
 #################
 
+IPTV_SIMPLE_ADDON_ID = 'pvr.iptvsimple'
+
 DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.130 Safari/537.36'
 
 #### SESSION ####
 SESSION_CHUNKSIZE = 4096
-#################
\ No newline at end of file
+#################
+
+#### PROXY ####
+PROXY_IDLE_TIMEOUT = 10
+PROXY_MANIFEST_CACHE_SIZE = 16
+PROXY_MANIFEST_TTL = 2
+PROXY_POOL_SIZE = 4
+PROXY_STREAM_ROUTES = 32
+#################
+
+#### CREDENTIALS ####
+CREDENTIALS_KEY = 'credentials.key'
+#################
+
+#### STATE ####
+STATE_DB = 'state.db'
+STATE_TIMEOUT = 10
+#################
+
+#### JOBS ####
+JOBS_TIMEOUT = 120
+JOBS_WORKERS = 4
+#################
+
+#### SCHEDULER ####
+SCHEDULER_BACKOFF = 60
+SCHEDULER_JITTER = 0.1
+SCHEDULER_MAX_WAIT = 900
+#################
+
+#### FILE CACHE ####
+FILE_CACHE_SIZE = 16 * 1024 * 1024
+#################
+
+#### LISTING CACHE ####
+LISTING_CACHE_DB = 'listings.db'
+LISTING_CACHE_SIZE = 8 * 1024 * 1024
+LISTING_CACHE_TTL = 900
+#################
+
+#### EPG ####
+EPG_CATCHUP_DAYS = 7
+#################
+
+#### REPLAY ####
+REPLAY_DB = 'replay.db'
+#################
+
+#### SEARCH ####
+SEARCH_CANDIDATES = 200
+SEARCH_DB = 'search.db'
+SEARCH_MIN_SCORE = 161
+#################
+
+#### DOWNLOAD ####
+DOWNLOAD_CHUNKSIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = (10, 60)
+#################
@@ -0,0 +1,353 @@
+import collections, hashlib, json, os, re, threading, time, xbmc, xbmcaddon
+
+try:
+    import http.server as ProxyServer
+except ImportError:
+    import BaseHTTPServer as ProxyServer
+
+try:
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from SocketServer import ThreadingMixIn
+
+from resources.lib.base import settings, state
+from resources.lib.base.constants import ADDON_ID, ADDON_PATH, ADDON_PROFILE, PROXY_IDLE_TIMEOUT, PROXY_MANIFEST_CACHE_SIZE, PROXY_MANIFEST_TTL, PROXY_POOL_SIZE, PROXY_STREAM_ROUTES
+from resources.lib.base.exceptions import PluginError
+from resources.lib.base.language import _
+from resources.lib.base.log import log
+from resources.lib.base.session import Session
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Streams can only be routed to the origin of a provider's stream url
+ORIGIN_REGEX = re.compile(r'^https?://[A-Za-z0-9.-]+(?::[0-9]+)?$')
+
+def get_pool_size():
+    pool_size = settings.getInt(key='proxy_pool_size', default=PROXY_POOL_SIZE)
+
+    if not pool_size or pool_size < 1:
+        pool_size = PROXY_POOL_SIZE
+
+    return pool_size
+
+def get_session(hostname, cookies_key=None, **kwargs):
+    # Proxy sessions never write cookies back, a login, logout or new user agent replaces them instead
+    version = (settings.get(key='_user_agent'), json.dumps(state.getDict(cookies_key, {}), sort_keys=True) if cookies_key else None)
+
+    with _sessions_lock:
+        session, session_version = _sessions.get(hostname, (None, None))
+
+        if not session or session_version != version:
+            session = Session(pool_size=get_pool_size(), cookies_key=cookies_key, persist_cookies=False, **kwargs)
+            _sessions[hostname] = (session, version)
+
+    return session
+
+def get_manifest_ttl():
+    ttl = settings.getInt(key='manifest_cache_ttl', default=PROXY_MANIFEST_TTL)
+
+    if ttl is None or ttl < 0:
+        ttl = PROXY_MANIFEST_TTL
+
+    return ttl
+
+def close_sessions():
+    with _sessions_lock:
+        for hostname in _sessions:
+            try:
+                _sessions[hostname][0].close()
+            except:
+                pass
+
+        _sessions.clear()
+
+class ManifestCache(object):
+    HEADERS_SKIP = ('connection', 'content-encoding', 'content-length', 'transfer-encoding')
+    MAX_AGE = re.compile(r'max-age=([0-9]+)')
+
+    def __init__(self, size=PROXY_MANIFEST_CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated, 'ttl': get_manifest_ttl()}
+
+    def get_ttl(self, headers):
+        cache_control = headers.get('Cache-Control', '').lower()
+
+        if 'no-store' in cache_control:
+            return None
+
+        if 'no-cache' in cache_control:
+            return 0
+
+        ttl = get_manifest_ttl()
+        max_age = self.MAX_AGE.search(cache_control)
+
+        if max_age:
+            ttl = min(ttl, int(max_age.group(1)))
+
+        return ttl
+
+    def fetch(self, session, url, key, process, headers=None):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry and entry['expires'] > time.time():
+                self.hits += 1
+                return entry
+
+        headers = dict(headers or {})
+
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        r = session.get(url, headers=headers)
+        ttl = self.get_ttl(r.headers)
+
+        if entry and r.status_code == 304:
+            with self.lock:
+                self.revalidated += 1
+
+                if ttl is not None:
+                    entry['expires'] = time.time() + ttl
+
+            return entry
+
+        entry = {
+            'status': r.status_code,
+            'headers': [(header, r.headers[header]) for header in r.headers if not header.lower() in self.HEADERS_SKIP],
+            'body': process(r.text),
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'expires': time.time() + (ttl or 0),
+        }
+
+        with self.lock:
+            self.misses += 1
+
+            if r.status_code == 200 and ttl is not None:
+                self.entries.pop(key, None)
+                self.entries[key] = entry
+
+                while len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+            else:
+                self.entries.pop(key, None)
+
+        return entry
+
+manifest_cache = ManifestCache()
+
+def get_stream_id(hostname, key=None):
+    if key:
+        hostname = hostname + '|' + key
+
+    return hashlib.md5(hostname.encode('utf-8')).hexdigest()[:16]
+
+class StreamRoutes(object):
+    def __init__(self, size=PROXY_STREAM_ROUTES):
+        self.size = size
+        self.lock = threading.Lock()
+        self.routes = collections.OrderedDict()
+
+    def register(self, hostname, key=None, token=None):
+        stream_id = get_stream_id(hostname, key)
+
+        with self.lock:
+            self.routes.pop(stream_id, None)
+            self.routes[stream_id] = {'hostname': hostname, 'token': token}
+
+            while len(self.routes) > self.size:
+                self.routes.popitem(last=False)
+
+        return stream_id
+
+    def resolve(self, path):
+        parts = path.split('/', 2)
+
+        if len(parts) < 3:
+            return None, path
+
+        with self.lock:
+            route = self.routes.get(parts[1])
+
+        return route, '/' + parts[2]
+
+stream_routes = StreamRoutes()
+
+def is_loopback(address):
+    return address == '::1' or address.startswith('127.') or address.startswith('::ffff:127.')
+
+def register_stream(hostname, key=None, token=None):
+    proxy_url = "http://127.0.0.1:{proxy_port}".format(proxy_port=settings.get(key='_proxyserver_port'))
+
+    # Without a route every manifest and segment request would end in a 404
+    try:
+        r = Session(timeout=(2, 5), attempts=2).post(proxy_url + '/_streams', json={'hostname': hostname, 'key': key, 'token': token})
+        stream_id = r.json()['stream_id']
+    except Exception as e:
+        log.error('Stream could not be registered with the proxy server: {}'.format(e))
+        raise PluginError(_.PROXY_REGISTER_FAILED)
+
+    return '{proxy_url}/{stream_id}'.format(proxy_url=proxy_url, stream_id=stream_id)
+
+class HTTPMonitor(xbmc.Monitor):
+    def __init__(self, addon):
+        super(HTTPMonitor, self).__init__()
+        self.addon = addon
+
+    def onSettingsChanged(self):
+        settings.invalidate()
+
+class BaseHTTPRequestHandler(ProxyServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = PROXY_IDLE_TIMEOUT
+
+    def do_GET(self):
+        if self.path == '/_manifest_cache':
+            self.send_json(manifest_cache.stats())
+            return
+
+        route, path = stream_routes.resolve(str(self.path))
+
+        if not route:
+            self.send_error(404)
+            return
+
+        self.proxy(hostname=route['hostname'], path=path, token=route['token'])
+
+    def do_POST(self):
+        if self.path != '/_streams':
+            self.send_error(404)
+            return
+
+        # The server listens on every interface, only the plugin on this box may add routes
+        if not is_loopback(self.client_address[0]):
+            self.send_error(403)
+            return
+
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8'))
+
+            if not ORIGIN_REGEX.match(data['hostname']):
+                raise ValueError(data['hostname'])
+
+            self.send_json({'stream_id': stream_routes.register(data['hostname'], key=data.get('key'), token=data.get('token'))})
+        except:
+            self.send_error(400)
+
+    def proxy(self, hostname, path, token=None):
+        self.send_error(404)
+
+    def send_json(self, data):
+        self.send_manifest({'status': 200, 'headers': [('Content-Type', 'application/json')], 'body': json.dumps(data)})
+
+    def send_manifest(self, entry):
+        xml = entry['body']
+
+        try:
+            xml = xml.encode('utf-8')
+        except:
+            pass
+
+        self.send_response(entry['status'])
+
+        for header, value in entry['headers']:
+            self.send_header(header, value)
+
+        self.send_header('Content-Length', len(xml))
+        self.end_headers()
+
+        try:
+            self.wfile.write(xml)
+        except:
+            pass
+
+    def send_redirect(self, url):
+        self.send_response(302)
+        self.send_header('Location', url)
+        self.send_header('Content-Length', 0)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        return
+
+class HTTPServer(ThreadingMixIn, ProxyServer.HTTPServer):
+    # A thread per connection, an idle keep-alive connection must not hold up the others
+    daemon_threads = True
+
+    def __init__(self, addon, server_address, handler):
+        ProxyServer.HTTPServer.__init__(self, server_address, handler)
+        self.addon = addon
+
+class RemoteControlBrowserService(xbmcaddon.Addon):
+    handler = BaseHTTPRequestHandler
+
+    def __init__(self):
+        super(RemoteControlBrowserService, self).__init__()
+        self.pluginId = ADDON_ID
+        self.addonFolder = ADDON_PATH
+        self.profileFolder = ADDON_PROFILE
+        self.settingsChangeLock = threading.Lock()
+        self.isShutdown = False
+        self.HTTPServer = None
+        self.HTTPServerThread = None
+
+    def clearBrowserLock(self):
+        """Clears the pidfile in case the last shutdown was not clean"""
+        browserLockPath = os.path.join(self.profileFolder, 'browser.pid')
+        try:
+            os.remove(browserLockPath)
+        except OSError:
+            pass
+
+    def reloadHTTPServer(self):
+        with self.settingsChangeLock:
+            self.startHTTPServer()
+
+    def shutdownHTTPServer(self):
+        with self.settingsChangeLock:
+            self.stopHTTPServer()
+            self.isShutdown = True
+
+        close_sessions()
+
+    def startHTTPServer(self):
+        if self.isShutdown:
+            return
+
+        self.stopHTTPServer()
+
+        try:
+            self.HTTPServer = HTTPServer(self, ('', settings.getInt(key='_proxyserver_port')), self.handler)
+        except IOError as e:
+            log.error('Proxy server could not be started: {}'.format(e))
+            return
+
+        threadStarting = threading.Thread(target=self.HTTPServer.serve_forever)
+        threadStarting.start()
+        self.HTTPServerThread = threadStarting
+
+    def stopHTTPServer(self):
+        if self.HTTPServer is not None:
+            self.HTTPServer.shutdown()
+            self.HTTPServer.server_close()
+            self.HTTPServer = None
+        if self.HTTPServerThread is not None:
+            self.HTTPServerThread.join()
+            self.HTTPServerThread = None
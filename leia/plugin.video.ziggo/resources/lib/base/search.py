@@ -0,0 +1,125 @@
+import collections, json, os, sqlite3, threading
+
+from fuzzywuzzy import fuzz, process, utils
+from resources.lib.base.constants import ADDON_PROFILE, REPLAY_DB, SEARCH_CANDIDATES, SEARCH_DB, SEARCH_MIN_SCORE, STATE_TIMEOUT
+
+_connection = None
+_lock = threading.RLock()
+_prepared = {}
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, source TEXT NOT NULL, category TEXT NOT NULL, size INTEGER NOT NULL, data TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS terms (source TEXT NOT NULL, term TEXT NOT NULL, document INTEGER NOT NULL, PRIMARY KEY (source, term, document)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS documents_source ON documents (source)',
+]
+
+SCORERS = (fuzz.token_set_ratio, fuzz.partial_ratio, fuzz.token_sort_ratio)
+
+# The catalogue each source is indexed from, prepared choices are dropped when it changes
+CATALOGUES = {'replay': REPLAY_DB, 'vod': 'vod.json'}
+
+def _connect():
+    global _connection
+
+    if not _connection:
+        if not os.path.isdir(ADDON_PROFILE):
+            os.makedirs(ADDON_PROFILE)
+
+        _connection = sqlite3.connect(os.path.join(ADDON_PROFILE, SEARCH_DB), timeout=STATE_TIMEOUT, isolation_level=None, check_same_thread=False)
+        _connection.execute('PRAGMA journal_mode=WAL')
+
+        for statement in SCHEMA:
+            _connection.execute(statement)
+
+    return _connection
+
+def _version(file):
+    try:
+        stat = os.stat(ADDON_PROFILE + file)
+    except OSError:
+        return None
+
+    return [stat.st_mtime, stat.st_size]
+
+def _get_prepared(source):
+    if source not in CATALOGUES:
+        return None
+
+    version = _version(CATALOGUES[source])
+
+    # The language invoker is reused, so the processed titles are kept across searches
+    with _lock:
+        if source not in _prepared or _prepared[source][0] != version:
+            _prepared[source] = (version, {})
+
+        return _prepared[source][1]
+
+def close():
+    global _connection
+
+    with _lock:
+        if _connection:
+            _connection.close()
+            _connection = None
+
+def get_matches(query, choices, limit=None, source=None):
+    # (key, label) pairs in, (label, (set, partial, sort), key) out, best first
+    choices = process.ChoiceSet(collections.OrderedDict(choices), processor=None, prepared=_get_prepared(source))
+
+    return choices.extractBests(query, scorer=SCORERS, score_cutoff=SEARCH_MIN_SCORE, limit=limit)
+
+def get_terms(value):
+    tokens = utils.full_process(value, force_ascii=True).split()
+    terms = set(tokens)
+
+    for token in tokens:
+        padded = ' ' + token + ' '
+        terms.update(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    return terms
+
+def has_source(source):
+    with _lock:
+        return _connect().execute('SELECT 1 FROM documents WHERE source = ? LIMIT 1', (source,)).fetchone() is not None
+
+def update(source, documents):
+    with _lock:
+        connection = _connect()
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            connection.execute('DELETE FROM terms WHERE source = ?', (source,))
+            connection.execute('DELETE FROM documents WHERE source = ?', (source,))
+
+            for category, label, data in documents:
+                terms = get_terms(label)
+                document = connection.execute('INSERT INTO documents (source, category, size, data) VALUES (?, ?, ?, ?)', (source, category, len(terms), json.dumps(data))).lastrowid
+                connection.executemany('INSERT INTO terms (source, term, document) VALUES (?, ?, ?)', ((source, term, document) for term in terms))
+        except:
+            connection.execute('ROLLBACK')
+            raise
+        else:
+            connection.execute('COMMIT')
+
+def find(source, query, limit=SEARCH_CANDIDATES):
+    terms = list(get_terms(query))
+    results = collections.OrderedDict()
+
+    if not terms:
+        return results
+
+    with _lock:
+        connection = _connect()
+        # Most query terms matched first, shorter titles first on equal matches
+        documents = [row[0] for row in connection.execute('SELECT terms.document FROM terms JOIN documents ON documents.id = terms.document WHERE terms.source = ? AND terms.term IN ({}) GROUP BY terms.document ORDER BY COUNT(*) DESC, documents.size, terms.document LIMIT ?'.format(', '.join('?' * len(terms))), [source] + terms + [limit])]
+
+        if not documents:
+            return results
+
+        rows = dict((row[0], row[1:]) for row in connection.execute('SELECT id, category, data FROM documents WHERE id IN ({})'.format(', '.join('?' * len(documents))), documents))
+
+    for document in documents:
+        category, data = rows[document]
+        results.setdefault(category, []).append(json.loads(data, object_pairs_hook=collections.OrderedDict))
+
+    return results
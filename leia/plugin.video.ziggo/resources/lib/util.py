@@ -1,5 +1,3 @@
-import re
-
 from resources.lib.base import settings
 from resources.lib.base.util import load_file
 from resources.lib.constants import CONST_DEFAULT_CLIENTID
@@ -33,20 +31,8 @@ def get_play_url(content):
 
     return {'play_url': '', 'locator': ''}
 
-def remove_ac3(xml):
-    try:
-        result = re.findall(r'<AdaptationSet(?:(?!</AdaptationSet>)[\S\s])+</AdaptationSet>', xml)
-
-        for match in result:
-            if "codecs=\"ac-3\"" in match:
-                xml = xml.replace(match, "")
-    except:
-        pass
-
-    return xml
-
 def update_settings():
-    settingsJSON = load_file(file='settings.json', isJSON=True)
+    settingsJSON = load_file(file='settings.json', isJSON=True, ordered=False)
 
     try:
         license_url = '{base_url}/{country_code}/{language_code}'.format(base_url=settingsJSON['settings']['urls']['base'], country_code=settingsJSON['settings']['countryCode'], language_code=settingsJSON['settings']['languageCode'])
@@ -8,7 +8,10 @@ ported from python-Levenshtein
 License available here: https://github.com/miohtama/python-Levenshtein/blob/master/COPYING
 """
 
-from Levenshtein import *
+try:
+    from Levenshtein import *
+except ImportError:
+    from .py_levenshtein import *
 from warnings import warn
 
 
@@ -1,11 +1,12 @@
 import os, time
 
-from resources.lib.base import gui, settings
+from resources.lib.base import gui, settings, state
 from resources.lib.base.constants import ADDON_ID, ADDON_PROFILE
 from resources.lib.base.exceptions import Error
 from resources.lib.base.log import log
+from resources.lib.base.proxy import register_stream
 from resources.lib.base.session import Session
-from resources.lib.base.util import check_key, combine_playlist, get_credentials, set_credentials, write_file
+from resources.lib.base.util import check_key, combine_playlist, get_credentials, get_local_images, set_credentials, write_file, write_playlist
 from resources.lib.constants import CONST_IMAGE_URL
 from resources.lib.language import _
 
@@ -19,7 +20,7 @@ class APIError(Error):
 
 class API(object):
     def new_session(self, force=False, channels=False):
-        cookies = settings.get(key='_cookies')
+        cookies = state.get(key='_cookies')
 
         if len(cookies) > 0 and force == False:
             self._session = Session(cookies_key='_cookies')
@@ -46,7 +47,7 @@ class API(object):
         self.login(username=username, password=password, channels=channels)
 
     def login(self, username, password, channels=False):
-        settings.remove(key='_cookies')
+        state.remove(key='_cookies')
         self._session = Session(cookies_key='_cookies')
 
         session_url = '{api_url}/USER/SESSIONS/'.format(api_url=settings.get(key='_api_url'))
@@ -97,7 +98,7 @@ class API(object):
         self.logged_in = True
 
     def clear_session(self):
-        settings.remove(key='_cookies')
+        state.remove(key='_cookies')
 
         try:
             self._session.clear_cookies()
@@ -113,17 +114,19 @@ class API(object):
 
             write_file(file="channels.json", data=data['resultObj']['containers'], isJSON=True)
 
-            playlist = u'#EXTM3U\n'
+            images = get_local_images()
+            playlist = []
 
             for row in data['resultObj']['containers']:
-                channeldata = self.get_channel_data(row=row)
+                channeldata = self.get_channel_data(row=row, images=images)
                 path = 'plugin://{addonid}/?_=play_video&channel={channel}&id={asset}&type=channel&_l=.pvr'.format(addonid=ADDON_ID, channel=channeldata['channel_id'], asset=channeldata['asset_id'])
-                playlist += u'#EXTINF:-1 tvg-id="{id}" tvg-chno="{channel}" tvg-name="{name}" tvg-logo="{logo}" group-title="TV" radio="false",{name}\n{path}\n'.format(id=channeldata['channel_id'], channel=channeldata['channel_number'], name=channeldata['label'], logo=channeldata['station_image_large'], path=path)
+                playlist.append(u'#EXTINF:-1 tvg-id="{id}" tvg-chno="{channel}" tvg-name="{name}" tvg-logo="{logo}" group-title="TV" radio="false",{name}\n{path}\n'.format(id=channeldata['channel_id'], channel=channeldata['channel_number'], name=channeldata['label'], logo=channeldata['station_image_large'], path=path))
 
-            write_file(file="tv.m3u8", data=playlist, isJSON=False)
-            combine_playlist()
+            write_playlist(file="tv.m3u8", entries=playlist)
 
-    def get_channel_data(self, row):
+            return combine_playlist()
+
+    def get_channel_data(self, row, images=None):
         asset_id = ''
 
         if check_key(row, 'assets'):
@@ -132,9 +135,13 @@ class API(object):
                     asset_id = asset['assetId']
                     break
 
-        path = ADDON_PROFILE + os.sep + "images" + os.sep + str(row['metadata']['channelId']) + ".png"
+        if images is None:
+            images = get_local_images()
+
+        file = str(row['metadata']['channelId']) + ".png"
+        path = ADDON_PROFILE + os.sep + "images" + os.sep + file
 
-        if os.path.isfile(path):
+        if file in images:
             image = path
         else:
             image = '{images_url}/logo/{external_id}/256.png'.format(images_url=CONST_IMAGE_URL, external_id=row['metadata']['externalId'])
@@ -151,8 +158,8 @@ class API(object):
         return channeldata
 
     def play_url(self, type, channel=None, id=None, force=True):
-        if not force == True and time.time() < (settings.getInt(key='_drm_token_age') + 300):
-            playdata = {'path': settings.get(key='_renew_path'), 'license': '', 'token': settings.get(key='_renew_token'), 'type': '', 'info': ''}
+        if not force == True and time.time() < (state.getInt(key='_drm_token_age') + 300):
+            playdata = {'path': state.get(key='_renew_path'), 'license': '', 'token': state.get(key='_renew_token'), 'type': '', 'info': ''}
             return playdata
 
         playdata = {'path': '', 'license': '', 'token': ''}
@@ -232,14 +239,13 @@ class API(object):
         token = data['resultObj']['token']
 
         real_url = "{hostscheme}://{hostname}".format(hostscheme=urlparse(path).scheme, hostname=urlparse(path).hostname)
-        proxy_url = "http://127.0.0.1:{proxy_port}".format(proxy_port=settings.get(key='_proxyserver_port'))
+        proxy_url = register_stream(hostname=real_url)
 
-        settings.set(key='_stream_hostname', value=real_url)
         path = path.replace(real_url, proxy_url)
 
-        settings.setInt(key='_drm_token_age', value=time.time())
-        settings.set(key='_renew_path', value=path)
-        settings.set(key='_renew_token', value=token)
+        state.setInt(key='_drm_token_age', value=time.time())
+        state.set(key='_renew_path', value=path)
+        state.set(key='_renew_token', value=token)
 
         playdata = {'path': path, 'license': license, 'token': token, 'type': typestr, 'info': info}
 
@@ -1,3 +1,5 @@
+import xbmc
+
 from resources.lib.base import log
 from resources.lib.base.constants import ADDON
 
@@ -6,6 +8,9 @@ try:
 except NameError:
     unicode = str
 
+_language = None
+_strings = {}
+
 def format_string(string, _bold=False, _label=False, _color=None, _strip=False, **kwargs):
     if kwargs:
         string = string.format(**kwargs)
@@ -26,14 +31,31 @@ def format_string(string, _bold=False, _label=False, _color=None, _strip=False,
     return string
 
 def addon_string(id):
+    try:
+        return _strings[id]
+    except KeyError:
+        pass
+
     string = ADDON.getLocalizedString(id)
 
     if not string:
         log.warning("LANGUAGE: Addon didn't return a string for id: {}".format(id))
         string = unicode(id)
 
+    _strings[id] = string
+
     return string
 
+def check_language():
+    global _language
+
+    language = xbmc.getLanguage(xbmc.ISO_639_1)
+
+    # Cached strings are only valid for the language they were read in
+    if language != _language:
+        _strings.clear()
+        _language = language
+
 class BaseLanguage(object):
     ASK_USERNAME = 30001
     ASK_PASSWORD = 30002
@@ -105,6 +127,7 @@ class BaseLanguage(object):
     ADD_TO_WATCHLIST_FAILED = 32087
     REMOVED_FROM_WATCHLIST = 32088
     REMOVE_FROM_WATCHLIST_FAILED = 32089
+    PROXY_REGISTER_FAILED = 32105
 
     def __getattribute__(self, name):
         attr = object.__getattribute__(self, name)
@@ -0,0 +1,111 @@
+import calendar, gzip, io, os, re, tempfile, time
+
+from resources.lib.base.constants import ADDON_PROFILE, EPG_CATCHUP_DAYS
+from resources.lib.base.files import replace_file, set_mode
+from resources.lib.base.log import log
+from xml.etree import ElementTree
+from xml.sax.saxutils import quoteattr
+
+TVG_ID_REGEX = re.compile(r'tvg-id="([^"]*)"')
+
+def get_channels(file='playlist.m3u8'):
+    if not os.path.isfile(ADDON_PROFILE + file):
+        return None
+
+    with io.open(ADDON_PROFILE + file, 'r', encoding='utf-8') as f:
+        return set(TVG_ID_REGEX.findall(f.read())) or None
+
+def parse_time(value):
+    try:
+        timestamp = calendar.timegm((int(value[0:4]), int(value[4:6]), int(value[6:8]), int(value[8:10]), int(value[10:12]), int(value[12:14])))
+        offset = value[14:].strip()
+
+        if offset:
+            timestamp -= (-1 if offset[0] == '-' else 1) * (int(offset[1:3]) * 3600 + int(offset[3:5]) * 60)
+
+        return timestamp
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def is_outdated(src, dst, sources):
+    if not os.path.isfile(dst):
+        return True
+
+    mtime = os.path.getmtime(dst)
+
+    return any(os.path.isfile(file) and os.path.getmtime(file) > mtime for file in [src] + sources)
+
+def compact_epg(src='epg.xml', dst='epg.xml.gz', days=EPG_CATCHUP_DAYS):
+    src = ADDON_PROFILE + src
+    dst = ADDON_PROFILE + dst
+
+    if not os.path.isfile(src) or not is_outdated(src, dst, [ADDON_PROFILE + 'playlist.m3u8']):
+        return False
+
+    start = time.time()
+    channels = get_channels()
+    cutoff = int(start) - days * 86400
+    kept = 0
+    total = 0
+
+    fd, tmp = tempfile.mkstemp(prefix='epg', suffix='.gz', dir=ADDON_PROFILE)
+
+    try:
+        with io.open(fd, 'wb') as f:
+            with gzip.GzipFile(filename='', mode='wb', fileobj=f, mtime=0) as output:
+                depth = 0
+                root = None
+
+                for event, elem in ElementTree.iterparse(src, events=('start', 'end')):
+                    if event == 'start':
+                        depth += 1
+
+                        if depth == 1:
+                            root = elem
+                            output.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+                            output.write(u'<{}{}>\n'.format(elem.tag, u''.join(u' {}={}'.format(key, quoteattr(value)) for key, value in elem.items())).encode('utf-8'))
+
+                        continue
+
+                    depth -= 1
+
+                    if depth != 1:
+                        continue
+
+                    if elem.tag == 'programme':
+                        total += 1
+
+                        if channels and elem.get('channel') not in channels:
+                            root.clear()
+                            continue
+
+                        stop = parse_time(elem.get('stop') or elem.get('start'))
+
+                        if stop is not None and stop < cutoff:
+                            root.clear()
+                            continue
+
+                        kept += 1
+                    elif elem.tag == 'channel' and channels and elem.get('id') not in channels:
+                        root.clear()
+                        continue
+
+                    tail, elem.tail = elem.tail, None
+                    output.write(ElementTree.tostring(elem, encoding='utf-8') + b'\n')
+                    elem.tail = tail
+                    root.clear()
+
+                if root is not None:
+                    output.write(u'</{}>\n'.format(root.tag).encode('utf-8'))
+
+        set_mode(tmp, dst)
+        replace_file(tmp, dst)
+    except:
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+
+        raise
+
+    log.debug('EPG compacted: {} programmes of {} kept, {} -> {} bytes in {:.2f}s'.format(kept, total, os.path.getsize(src), os.path.getsize(dst), time.time() - start))
+
+    return True
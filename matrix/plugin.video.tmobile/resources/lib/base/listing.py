@@ -0,0 +1,100 @@
+import datetime, hashlib, json, os, sqlite3, threading, time
+
+from resources.lib.base.constants import ADDON_PROFILE, LISTING_CACHE_DB, LISTING_CACHE_SIZE, LISTING_CACHE_TTL, STATE_TIMEOUT
+
+_connection = None
+_lock = threading.RLock()
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS listings (key TEXT PRIMARY KEY, data TEXT NOT NULL, size INTEGER NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS listings_used ON listings (used)',
+]
+
+def _connect():
+    global _connection
+
+    if not _connection:
+        if not os.path.isdir(ADDON_PROFILE):
+            os.makedirs(ADDON_PROFILE)
+
+        _connection = sqlite3.connect(os.path.join(ADDON_PROFILE, LISTING_CACHE_DB), timeout=STATE_TIMEOUT, isolation_level=None, check_same_thread=False)
+        _connection.execute('PRAGMA journal_mode=WAL')
+        _connection.execute('PRAGMA synchronous=NORMAL')
+
+        for statement in SCHEMA:
+            _connection.execute(statement)
+
+    return _connection
+
+def _version(file):
+    try:
+        stat = os.stat(ADDON_PROFILE + file)
+    except OSError:
+        return None
+
+    return [stat.st_mtime, stat.st_size]
+
+def close():
+    global _connection
+
+    with _lock:
+        if _connection:
+            _connection.close()
+            _connection = None
+
+def get_key(route, params, language, files=()):
+    # Listings filter on availability windows relative to today, so the date is part of the key
+    key = json.dumps([route, sorted(params.items()), language, datetime.date.today().isoformat(), [[file, _version(file)] for file in sorted(files)]])
+
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def get(key):
+    now = time.time()
+
+    with _lock:
+        connection = _connect()
+        row = connection.execute('SELECT data FROM listings WHERE key = ? AND expires > ?', (key, now)).fetchone()
+
+        if not row:
+            return None
+
+        connection.execute('UPDATE listings SET used = ? WHERE key = ?', (now, key))
+
+    return json.loads(row[0])
+
+def set(key, data):
+    data = json.dumps(data)
+    now = time.time()
+
+    if len(data) > LISTING_CACHE_SIZE:
+        return
+
+    with _lock:
+        connection = _connect()
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            connection.execute('DELETE FROM listings WHERE expires <= ?', (now,))
+            connection.execute('INSERT OR REPLACE INTO listings (key, data, size, expires, used) VALUES (?, ?, ?, ?, ?)', (key, data, len(data), now + LISTING_CACHE_TTL, now))
+            total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM listings').fetchone()[0]
+            evict = []
+
+            # Least recently used listings go first
+            if total > LISTING_CACHE_SIZE:
+                for row in connection.execute('SELECT key, size FROM listings ORDER BY used'):
+                    if total <= LISTING_CACHE_SIZE:
+                        break
+
+                    evict.append((row[0],))
+                    total -= row[1]
+
+            connection.executemany('DELETE FROM listings WHERE key = ?', evict)
+        except:
+            connection.execute('ROLLBACK')
+            raise
+        else:
+            connection.execute('COMMIT')
+
+def clear():
+    with _lock:
+        _connect().execute('DELETE FROM listings')
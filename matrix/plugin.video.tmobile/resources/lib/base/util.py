@@ -1,16 +1,13 @@
-import collections, glob, hashlib, io, json, os, platform, pytz, re, requests, shutil, struct, socket, sys, time, xbmc, xbmcaddon
+import collections, glob, hashlib, io, json, os, platform, pytz, re, requests, shutil, struct, socket, sys, tempfile, threading, time, xbmc, xbmcaddon
 
 from contextlib import closing
-from resources.lib.base import settings
-from resources.lib.base.constants import ADDON_ID, ADDON_PATH, ADDON_PROFILE, DEFAULT_USER_AGENT
+from resources.lib.base import epg, listing, replay, search, settings, state
+from resources.lib.base.constants import ADDON_ID, ADDON_PATH, ADDON_PROFILE, DEFAULT_USER_AGENT, DOWNLOAD_CHUNKSIZE, DOWNLOAD_TIMEOUT, FILE_CACHE_SIZE, IPTV_SIMPLE_ADDON_ID
 from resources.lib.base.encrypt import Credentials
+from resources.lib.base.files import replace_file, set_mode
+from resources.lib.base.log import log
 from resources.lib.constants import CONST_EPG, CONST_IMAGES, CONST_MINIMALEPG, CONST_RADIO, CONST_SETTINGS, CONST_VOD
 
-try:
-    from io import BytesIO
-except ImportError:
-    from StringIO import StringIO as BytesIO
-
 try:
     unicode
 except NameError:
@@ -18,12 +15,17 @@ except NameError:
 
 from zipfile import ZipFile
 
+DURATION_PARSE_REGEX = re.compile(r'mediaPresentationDuration="PT(?:([0-9]*)D)?(?:([0-9]*)H)?([0-9]*)M([0-9]*)[0-9.]*S"')
+DURATION_REPLACE_REGEX = re.compile(r'uration="[a-zA-Z0-9.]*"(>?)')
+
+_kodi_version = None
+
 def change_icon():
-    settingsJSON = load_file(file='settings.json', isJSON=True)
+    settingsJSON = load_file(file='settings.json', isJSON=True, ordered=False)
 
     if check_key(settingsJSON, 'icon'):
         if md5sum(ADDON_PROFILE + "icon.png") != settingsJSON['icon']['md5']:
-            r = requests.get(settingsJSON['icon']['url'], stream=True)
+            r = requests.get(settingsJSON['icon']['url'], stream=True, timeout=DOWNLOAD_TIMEOUT)
 
             if r.status_code == 200:
                 with open(ADDON_PROFILE + "icon.png", 'wb') as f:
@@ -71,7 +73,10 @@ def check_iptv_link():
         try:
             IPTV_SIMPLE = xbmcaddon.Addon(id="pvr.iptvsimple")
 
-            if not IPTV_SIMPLE.getSetting("epgPath") == (ADDON_PROFILE + "epg.xml") or not IPTV_SIMPLE.getSetting("m3uPath") == (ADDON_PROFILE + "playlist.m3u8"):
+            if IPTV_SIMPLE.getSetting("epgPath") == (ADDON_PROFILE + "epg.xml") and os.path.isfile(ADDON_PROFILE + "epg.xml.gz"):
+                IPTV_SIMPLE.setSetting("epgPath", ADDON_PROFILE + "epg.xml.gz")
+
+            if not IPTV_SIMPLE.getSetting("epgPath") == (ADDON_PROFILE + "epg.xml.gz") or not IPTV_SIMPLE.getSetting("m3uPath") == (ADDON_PROFILE + "playlist.m3u8"):
                 settings.setBool(key='enable_simple_iptv', value=False)
             else:
                 user_agent = settings.get(key='_user_agent')
@@ -87,6 +92,13 @@ def check_key(object, key):
     else:
         return False
 
+def clear_listings():
+    # Cached listings are keyed on file versions too, this only reclaims their space early
+    try:
+        listing.clear()
+    except Exception as e:
+        log.error('Listing cache could not be cleared: {}'.format(e))
+
 def combine_playlist():
     tv = load_file(file='tv.m3u8', isJSON=False)
 
@@ -101,7 +113,13 @@ def combine_playlist():
     if not radio:
         radio = ''
 
-    write_file(file='playlist.m3u8', data=tv + radio, isJSON=False)
+    if not update_file(file='playlist.m3u8', data=tv + radio):
+        return False
+
+    epg.compact_epg()
+    refresh_iptv_simple()
+
+    return True
 
 def convert_datetime_timezone(dt, tz1, tz2):
     tz1 = pytz.timezone(tz1)
@@ -144,17 +162,27 @@ def date_to_nl_maand(curdate):
     return maand.get(curdate.strftime("%B"), "")
 
 def download_epg():
-    settings.setInt(key='_epgrun', value=1)
-    settings.setInt(key='_epgruntime', value=time.time())
+    if not state.claim(key='_epgrun', timeout=300):
+        return False
+
+    try:
+        _download_epg()
+        epg.compact_epg()
+    finally:
+        state.release(key='_epgrun')
+
+    return True
 
+def _download_epg():
     if settings.getBool(key="minimalChannels"):
-        resp = requests.get(url=CONST_MINIMALEPG)
+        url = CONST_MINIMALEPG
     else:
-        resp = requests.get(url=CONST_EPG)
+        url = CONST_EPG
 
-    zipfile = ZipFile(BytesIO(resp.content))
-    zipfile.extractall(ADDON_PROFILE)
-    zipfile.close()
+    if not download_zip(url=url, marker=ADDON_PROFILE + "epg.xml"):
+        return
+
+    file_cache.clear()
 
     for file in glob.glob(ADDON_PROFILE + os.sep + "*_replay.xml"):
         if is_file_older_than_x_days(file=file, days=7):
@@ -164,18 +192,18 @@ def download_epg():
         if is_file_older_than_x_days(file=file, days=7):
             os.remove(file)
 
-    settings.setInt("_epgrun", 0)
-
-def download_images():
-    resp = requests.get(url=CONST_IMAGES)
+    try:
+        replay.ingest()
+    except Exception as e:
+        log.error('Replay catalogue could not be built: {}'.format(e))
 
-    zipfile = ZipFile(BytesIO(resp.content))
-    zipfile.extractall(ADDON_PROFILE)
-    zipfile.close()
+    clear_listings()
 
-    for file in glob.glob(ADDON_PROFILE + os.sep + "images" + os.sep + "*.png"):
-        if is_file_older_than_x_days(file=file, days=7):
-            os.remove(file)
+def download_images():
+    if download_zip(url=CONST_IMAGES, marker=ADDON_PROFILE + "images" + os.sep + "time"):
+        for file in glob.glob(ADDON_PROFILE + os.sep + "images" + os.sep + "*.png"):
+            if is_file_older_than_x_days(file=file, days=7):
+                os.remove(file)
 
     fname = ADDON_PROFILE + os.sep + "images" + os.sep + "time"
 
@@ -186,18 +214,93 @@ def download_images():
             pass
 
 def download_settings():
-    resp = requests.get(url=CONST_SETTINGS)
+    resp = requests.get(url=CONST_SETTINGS, timeout=DOWNLOAD_TIMEOUT)
     write_file(file='settings.json', data=resp.text, isJSON=False)
 
     if settings.getBool(key='showMoviesSeries') == True:
-        resp = requests.get(url=CONST_VOD)
+        resp = requests.get(url=CONST_VOD, timeout=DOWNLOAD_TIMEOUT)
         write_file(file='vod.json', data=resp.text, isJSON=False)
 
+        try:
+            index_vod()
+        except Exception as e:
+            log.error('VOD search index could not be built: {}'.format(e))
+
     if settings.getBool(key='enable_radio') == True:
-        resp = requests.get(url=CONST_RADIO)
+        resp = requests.get(url=CONST_RADIO, timeout=DOWNLOAD_TIMEOUT)
         write_file(file='radio.m3u8', data=resp.text, isJSON=False)
         combine_playlist()
 
+    clear_listings()
+
+def download_zip(url, marker=None):
+    validators = state.getDict(key='_validators', default={})
+    headers = {}
+
+    if marker and os.path.isfile(marker) and url in validators:
+        if validators[url].get('etag'):
+            headers['If-None-Match'] = validators[url]['etag']
+
+        if validators[url].get('modified'):
+            headers['If-Modified-Since'] = validators[url]['modified']
+
+    if not os.path.isdir(ADDON_PROFILE):
+        os.makedirs(ADDON_PROFILE)
+
+    fd, tmp = tempfile.mkstemp(prefix='download', suffix='.zip', dir=ADDON_PROFILE)
+    tmp_dir = None
+    downloaded = 0
+    start = time.time()
+
+    try:
+        with closing(requests.get(url=url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT)) as resp:
+            if resp.status_code == 304:
+                log.debug('Download {} not modified'.format(url))
+
+                if marker and os.path.isfile(marker):
+                    os.utime(marker, None)
+
+                return False
+
+            resp.raise_for_status()
+
+            with os.fdopen(fd, 'wb') as f:
+                fd = None
+
+                for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNKSIZE):
+                    f.write(chunk)
+                    downloaded += len(chunk)
+
+            validators[url] = {'etag': resp.headers.get('ETag'), 'modified': resp.headers.get('Last-Modified')}
+
+        tmp_dir = tempfile.mkdtemp(prefix='extract', dir=ADDON_PROFILE)
+
+        with ZipFile(tmp) as zipfile:
+            zipfile.extractall(tmp_dir)
+
+        for root, dirs, files in os.walk(tmp_dir):
+            target = os.path.join(ADDON_PROFILE, os.path.relpath(root, tmp_dir))
+
+            if not os.path.isdir(target):
+                os.makedirs(target)
+
+            for file in files:
+                replace_file(os.path.join(root, file), os.path.join(target, file))
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    state.setDict(key='_validators', value=validators)
+    log.debug('Download {} finished: {} bytes in {:.2f}s'.format(url, downloaded, time.time() - start))
+
+    return True
+
 def find_free_port():
     with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
         s.bind(('', 0))
@@ -215,10 +318,21 @@ def get_credentials():
     return Credentials().decode_credentials(username, password)
 
 def get_kodi_version():
+    global _kodi_version
+
+    if _kodi_version is None:
+        try:
+            _kodi_version = int(xbmc.getInfoLabel("System.BuildVersion").split('.')[0])
+        except:
+            return 0
+
+    return _kodi_version
+
+def get_local_images():
     try:
-        return int(xbmc.getInfoLabel("System.BuildVersion").split('.')[0])
-    except:
-        return 0
+        return set(os.listdir(ADDON_PROFILE + "images"))
+    except OSError:
+        return set()
 
 def get_system_arch():
     if xbmc.getCondVisibility('System.Platform.UWP') or '4n2hpmxwrvr6p' in xbmc.translatePath('special://xbmc/'):
@@ -257,6 +371,32 @@ def images_download():
     if is_file_older_than_x_days(file=ADDON_PROFILE + "images" + os.sep + "time", days=1):
         download_images()
 
+def index_vod():
+    data = load_file(file='vod.json', isJSON=True) or {}
+    search.update(source='vod', documents=((category, row['title'], row) for category in data if isinstance(data[category], list) for row in data[category] if isinstance(row, dict) and check_key(row, 'title')))
+
+def iptv_simple_changed():
+    changed = {}
+
+    for file in ('playlist.m3u8', 'epg.xml.gz'):
+        if not os.path.isfile(ADDON_PROFILE + file):
+            continue
+
+        stat = os.stat(ADDON_PROFILE + file)
+        stored = load_file(file=file + '.hash', isJSON=True, ordered=False) or {}
+
+        if stored.get('size') == stat.st_size and stored.get('mtime') == stat.st_mtime:
+            continue
+
+        entry = {'md5': md5sum(ADDON_PROFILE + file), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+        if stored.get('md5') == entry['md5']:
+            write_file(file=file + '.hash', data=entry, isJSON=True)
+        else:
+            changed[file] = entry
+
+    return changed
+
 def is_file_older_than_x_days(file, days=1):
     if not os.path.isfile(file):
         return True
@@ -270,13 +410,75 @@ def is_file_older_than_x_days(file, days=1):
     else:
         return False
 
-def load_file(file, isJSON=False):
+class FileCache(object):
+    def __init__(self, size=FILE_CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self, path=None):
+        with self.lock:
+            for key in list(self.entries):
+                if path is None or key[0] == path:
+                    self.bytes -= self.entries.pop(key)['size']
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
+
+    def load(self, path, ordered=True):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        key = (path, ordered)
+        version = (stat.st_mtime, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry and entry['version'] == version:
+                self.hits += 1
+                self.entries.pop(key)
+                self.entries[key] = entry
+                return entry['data']
+
+            self.misses += 1
+
+        with io.open(path, 'r', encoding='utf-8') as f:
+            if ordered == True:
+                data = json.load(f, object_pairs_hook=collections.OrderedDict)
+            else:
+                data = json.load(f)
+
+        with self.lock:
+            old = self.entries.pop(key, None)
+
+            if old:
+                self.bytes -= old['size']
+
+            if stat.st_size <= self.size:
+                self.entries[key] = {'version': version, 'size': stat.st_size, 'data': data}
+                self.bytes += stat.st_size
+
+                while self.bytes > self.size:
+                    self.bytes -= self.entries.popitem(last=False)[1]['size']
+
+        return data
+
+file_cache = FileCache()
+
+def load_file(file, isJSON=False, ordered=True):
+    if isJSON == True:
+        return file_cache.load(ADDON_PROFILE + file, ordered=ordered)
+
     if os.path.isfile(ADDON_PROFILE + file):
         with io.open(ADDON_PROFILE + file, 'r', encoding='utf-8') as f:
-            if isJSON == True:
-                return json.load(f, object_pairs_hook=collections.OrderedDict)
-            else:
-                return f.read()
+            return f.read()
     else:
         return None
 
@@ -284,11 +486,57 @@ def md5sum(filepath):
     if not os.path.isfile(filepath):
         return None
 
-    return hashlib.md5(open(filepath,'rb').read()).hexdigest()
+    md5 = hashlib.md5()
+
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNKSIZE), b''):
+            md5.update(chunk)
+
+    return md5.hexdigest()
+
+def refresh_iptv_simple():
+    if settings.getBool(key='enable_simple_iptv') != True:
+        return False
+
+    try:
+        IPTV_SIMPLE = xbmcaddon.Addon(id=IPTV_SIMPLE_ADDON_ID)
+    except:
+        return False
+
+    if IPTV_SIMPLE.getSetting("epgPath") != (ADDON_PROFILE + "epg.xml.gz") or IPTV_SIMPLE.getSetting("m3uPath") != (ADDON_PROFILE + "playlist.m3u8"):
+        return False
+
+    changed = iptv_simple_changed()
+
+    if not changed:
+        return False
+
+    if xbmc.Player().isPlaying():
+        log.debug('IPTV Simple refresh postponed during playback: {}'.format(', '.join(changed)))
+        return False
+
+    log.debug('IPTV Simple refresh: {}'.format(', '.join(changed)))
+
+    xbmc.executeJSONRPC('{{"jsonrpc":"2.0","id":1,"method":"Addons.SetAddonEnabled","params":{{"addonid":"{}","enabled":false}}}}'.format(IPTV_SIMPLE_ADDON_ID))
+    xbmc.sleep(2000)
+    xbmc.executeJSONRPC('{{"jsonrpc":"2.0","id":1,"method":"Addons.SetAddonEnabled","params":{{"addonid":"{}","enabled":true}}}}'.format(IPTV_SIMPLE_ADDON_ID))
+
+    for file in changed:
+        write_file(file=file + '.hash', data=changed[file], isJSON=True)
+
+    return True
 
 def renew_epg():
-    if is_file_older_than_x_days(file=ADDON_PROFILE + "epg.xml", days=0.5) and (settings.getInt(key='_epgrun') == 0 or settings.getInt(key='_epgruntime') < (int(time.time()) - 300)):
+    if is_file_older_than_x_days(file=ADDON_PROFILE + "epg.xml", days=0.5):
         download_epg()
+    else:
+        epg.compact_epg()
+
+def search_vod(query):
+    if not search.has_source(source='vod') and os.path.isfile(ADDON_PROFILE + 'vod.json'):
+        index_vod()
+
+    return search.find(source='vod', query=query)
 
 def set_credentials(username, password):
     encoded = Credentials().encode_credentials(username, password)
@@ -303,69 +551,35 @@ def set_credentials(username, password):
     except:
         settings.set(key='_pswd', value=encoded['password'])
 
-def set_duration(xml):
+def set_duration(xml, duration=0, add_duration=0):
     try:
-        duration = settings.getInt(key='_stream_duration')
-
         if duration and duration > 0:
             given_duration = 0
-            matched = False
-            duration += settings.getInt(key='add_duration')
+            duration += add_duration or 0
 
-            regex = r"mediaPresentationDuration=\"PT([0-9]*)M([0-9]*)[0-9.]*S\""
-            matches2 = re.finditer(regex, xml, re.MULTILINE)
+            match = DURATION_PARSE_REGEX.search(xml)
 
-            if len([i for i in matches2]) > 0:
-                matches = re.finditer(regex, xml, re.MULTILINE)
-                matched = True
-            else:
-                regex2 = r"mediaPresentationDuration=\"PT([0-9]*)H([0-9]*)M([0-9]*)[0-9.]*S\""
-                matches3 = re.finditer(regex2, xml, re.MULTILINE)
-
-                if len([i for i in matches3]) > 0:
-                    matches = re.finditer(regex2, xml, re.MULTILINE)
-                    matched = True
-                else:
-                    regex3 = r"mediaPresentationDuration=\"PT([0-9]*)D([0-9]*)H([0-9]*)M([0-9]*)[0-9.]*S\""
-                    matches4 = re.finditer(regex3, xml, re.MULTILINE)
-
-                    if len([i for i in matches4]) > 0:
-                        matches = re.finditer(regex3, xml, re.MULTILINE)
-                        matched = True
-
-            if matched == True:
-                given_day = 0
-                given_hour = 0
-                given_minute = 0
-                given_second = 0
-
-                for matchNum, match in enumerate(matches, start=1):
-                    if len(match.groups()) == 2:
-                        given_minute = int(match.group(1))
-                        given_second = int(match.group(2))
-                    elif len(match.groups()) == 3:
-                        given_hour = int(match.group(1))
-                        given_minute = int(match.group(2))
-                        given_second = int(match.group(3))
-                    elif len(match.groups()) == 4:
-                        given_day = int(match.group(1))
-                        given_hour = int(match.group(2))
-                        given_minute = int(match.group(3))
-                        given_second = int(match.group(4))
-
-                given_duration = (given_day * 24* 60 * 60) + (given_hour * 60 * 60) + (given_minute * 60) + given_second
+            if match:
+                given_day, given_hour, given_minute, given_second = [int(value or 0) for value in match.groups()]
+                given_duration = (given_day * 24 * 60 * 60) + (given_hour * 60 * 60) + (given_minute * 60) + given_second
 
             if not given_duration > 0 or given_duration > duration:
                 minute, second = divmod(duration, 60)
                 hour, minute = divmod(minute, 60)
 
-                regex4 = r"mediaPresentationDuration=\"[a-zA-Z0-9.]*\""
-                subst = "mediaPresentationDuration=\"PT{hour}H{minute}M{second}S\"".format(hour=hour, minute=minute, second=second)
-                regex5 = r"duration=\"[a-zA-Z0-9.]*\">"
-                subst2 = "duration=\"PT{hour}H{minute}M{second}S\">".format(hour=hour, minute=minute, second=second)
+                subst = "uration=\"PT{hour}H{minute}M{second}S\"".format(hour=hour, minute=minute, second=second)
+
+                def replace(match):
+                    start = match.start()
+
+                    if xml.endswith('mediaPresentationD', 0, start):
+                        return subst + match.group(1)
+                    elif match.group(1) and xml[start - 1] == 'd':
+                        return subst + '>'
+
+                    return match.group(0)
 
-                xml = re.sub(regex4, subst, xml, 0, re.MULTILINE)
-                xml = re.sub(regex5, subst2, xml, 0, re.MULTILINE)
+                xml = DURATION_REPLACE_REGEX.sub(replace, xml)
     except:
         pass
 
@@ -375,17 +589,45 @@ def settings_download():
     if is_file_older_than_x_days(file=ADDON_PROFILE + "settings.json", days=1):
         download_settings()
 
+def update_file(file, data, isJSON=False):
+    if isJSON == True:
+        data = json.dumps(data, ensure_ascii=False)
+
+    if load_file(file=file, isJSON=False) == data:
+        return False
+
+    write_file(file=file, data=data, isJSON=False)
+
+    return True
+
 def update_user_agent():
-    settingsJSON = load_file(file='settings.json', isJSON=True)
+    settingsJSON = load_file(file='settings.json', isJSON=True, ordered=False)
 
     try:
         settings.set(key='_user_agent', value=settingsJSON['user_agent'])
     except:
         settings.set(key='_user_agent', value=DEFAULT_USER_AGENT)
 
+def write_playlist(file, entries):
+    return update_file(file=file, data=u'#EXTM3U\n' + u''.join(entries))
+
 def write_file(file, data, isJSON=False):
-    with io.open(ADDON_PROFILE + file, 'w', encoding="utf-8") as f:
-        if isJSON == True:
-            f.write(unicode(json.dumps(data, ensure_ascii=False)))
-        else:
-            f.write(unicode(data))
\ No newline at end of file
+    file_cache.clear(path=ADDON_PROFILE + file)
+
+    fd, tmp = tempfile.mkstemp(prefix='write', dir=os.path.dirname(ADDON_PROFILE + file))
+    os.close(fd)
+
+    try:
+        with io.open(tmp, 'w', encoding="utf-8") as f:
+            if isJSON == True:
+                f.write(unicode(json.dumps(data, ensure_ascii=False)))
+            else:
+                f.write(unicode(data))
+
+        set_mode(tmp, ADDON_PROFILE + file)
+        replace_file(tmp, ADDON_PROFILE + file)
+    except:
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+
+        raise
\ No newline at end of file
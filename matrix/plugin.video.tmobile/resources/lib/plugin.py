@@ -2,12 +2,13 @@ import _strptime
 
 import datetime, json, pytz, string, time, xbmc
 
-from fuzzywuzzy import fuzz
 from resources.lib.api import API
-from resources.lib.base import plugin, gui, signals, inputstream, settings
+from resources.lib.base import plugin, gui, replay, signals, inputstream, settings, state
+from resources.lib.base.constants import REPLAY_DB
 from resources.lib.base.exceptions import Error
 from resources.lib.base.log import log
-from resources.lib.base.util import check_key, convert_datetime_timezone, date_to_nl_dag, date_to_nl_maand, get_credentials, load_file
+from resources.lib.base.search import get_matches
+from resources.lib.base.util import check_key, convert_datetime_timezone, date_to_nl_dag, date_to_nl_maand, get_credentials, get_local_images, load_file
 from resources.lib.language import _
 
 try:
@@ -117,25 +118,26 @@ def replaytv_alphabetical(**kwargs):
     return folder
 
 @plugin.route()
+@plugin.cached_listing(files=[REPLAY_DB])
 def replaytv_list(character, label='', start=0, **kwargs):
     start = int(start)
     folder = plugin.Folder(title=label)
 
-    data = load_file(file='list_replay.json', isJSON=True)
-
-    if not data:
+    if not replay.count_titles():
         gui.ok(message=_.NO_REPLAY_TV_INFO, heading=_.NO_REPLAY_TV_INFO)
         return folder
 
-    if not check_key(data, character):
+    totalrows = replay.count_titles(character=character)
+
+    if not totalrows:
         return folder
 
-    processed = process_replaytv_list(data=data[character], start=start)
+    processed = process_replaytv_list(character=character, start=start)
 
     if check_key(processed, 'items'):
         folder.add_items(processed['items'])
 
-    if check_key(processed, 'count') and len(data[character]) > processed['count']:
+    if check_key(processed, 'count') and totalrows > processed['count']:
         folder.add_item(
             label = _(_.NEXT_PAGE, _bold=True),
             path = plugin.url_for(func_or_url=replaytv_list, character=character, label=label, start=processed['count']),
@@ -172,6 +174,7 @@ def replaytv_by_day(label='', image='', description='', station='', **kwargs):
     return folder
 
 @plugin.route()
+@plugin.cached_listing(files=[REPLAY_DB])
 def replaytv_item(ids=None, label=None, start=0, **kwargs):
     start = int(start)
     first = label[0]
@@ -179,14 +182,14 @@ def replaytv_item(ids=None, label=None, start=0, **kwargs):
     folder = plugin.Folder(title=label)
 
     if first.isalpha():
-        data = load_file(file=first + "_replay.json", isJSON=True)
+        source = first
     else:
-        data = load_file(file='other_replay.json', isJSON=True)
+        source = 'other'
 
-    if not data:
+    if not replay.has_source(source=source):
         return folder
 
-    processed = process_replaytv_list_content(data=data, ids=ids, start=start)
+    processed = process_replaytv_list_content(source=source, ids=ids, start=start)
 
     if check_key(processed, 'items'):
         folder.add_items(processed['items'])
@@ -200,23 +203,21 @@ def replaytv_item(ids=None, label=None, start=0, **kwargs):
     return folder
 
 @plugin.route()
+@plugin.cached_listing(files=[REPLAY_DB])
 def replaytv_content(label, day, station='', start=0, **kwargs):
     day = int(day)
     start = int(start)
     folder = plugin.Folder(title=label)
 
-    data = load_file(file=station + "_replay.json", isJSON=True)
-
-    if not data:
+    if not replay.has_source(source=station):
         return folder
 
-    totalrows = len(data)
-    processed = process_replaytv_content(data=data, day=day, start=start)
+    processed = process_replaytv_content(station=station, day=day, start=start)
 
     if check_key(processed, 'items'):
         folder.add_items(processed['items'])
 
-    if check_key(processed, 'count') and totalrows > processed['count']:
+    if check_key(processed, 'more') and processed['more'] == True:
         folder.add_item(
             label = _(_.NEXT_PAGE, _bold=True),
             path = plugin.url_for(func_or_url=replaytv_content, label=label, day=day, station=station, start=processed['count']),
@@ -266,8 +267,7 @@ def search(query=None, **kwargs):
 
     folder = plugin.Folder(title=_(_.SEARCH_FOR, query=query))
 
-    data = load_file(file='list_replay.json', isJSON=True)
-    processed = process_replaytv_search(data=data, start=0, search=query)
+    processed = process_replaytv_search(data=replay.search_titles(query=query), start=0, search=query)
     items += processed['items']
 
     items[:] = sorted(items, key=_sort_replay_items, reverse=True)
@@ -390,14 +390,16 @@ def play_video(type=None, channel=None, id=None, **kwargs):
     rows = load_file(file='channels.json', isJSON=True)
 
     if rows:
+        images = get_local_images()
+
         for row in rows:
-            channeldata = api.get_channel_data(rows=rows, row=row)
+            channeldata = api.get_channel_data(rows=rows, row=row, images=images)
 
             if channeldata['channel_id'] == channel:
                 label2 += " - "  + channeldata['label']
                 break
 
-    settings.setInt(key='_stream_duration', value=duration)
+    state.setInt(key='_stream_duration', value=duration)
 
     listitem = plugin.Item(
         label = itemlabel,
@@ -462,8 +464,10 @@ def get_live_channels(addon=False):
 
                 query_channel = json.loads(xbmc.executeJSONRPC('{"jsonrpc": "2.0", "method": "PVR.GetChannels", "params": {"channelgroupid": "alltv", "properties" :["uniqueid"]},"id": 1}'))
 
+        images = get_local_images()
+
         for row in rows:
-            channeldata = api.get_channel_data(rows=rows, row=row)
+            channeldata = api.get_channel_data(rows=rows, row=row, images=images)
 
             path = plugin.url_for(func_or_url=play_video, type='channel', channel=channeldata['channel_id'], id=None, _is_live=True)
             playable = True
@@ -498,8 +502,10 @@ def get_replay_channels():
     rows = load_file(file='channels.json', isJSON=True)
 
     if rows:
+        images = get_local_images()
+
         for row in rows:
-            channeldata = api.get_channel_data(rows=rows, row=row)
+            channeldata = api.get_channel_data(rows=rows, row=row, images=images)
 
             channels.append({
                 'label': channeldata['label'],
@@ -515,24 +521,18 @@ def get_replay_channels():
 
     return channels
 
-def process_replaytv_list(data, start=0):
+def process_replaytv_list(character, start=0):
     start = int(start)
     items = []
-    count = 0
+    count = start
     item_count = 0
     time_now = int((datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds())
 
-    for row in sorted(data):
-        currow = data[row]
-
+    for pos, currow in replay.get_titles(character=character, start=start):
         if item_count == 51:
             break
 
-        if count < start:
-            count += 1
-            continue
-
-        count += 1
+        count = pos + 1
 
         if not check_key(currow, 'orig') or not check_key(currow, 'ids'):
             continue
@@ -555,18 +555,11 @@ def process_replaytv_search(data, start=0, search=None):
     start = int(start)
     items = []
     count = 0
-    item_count = 0
+    rows = []
     time_now = int((datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds())
 
     for row in data:
-        letter_row = data[row]
-
-        for row2 in letter_row:
-            currow = data[row][row2]
-
-            if item_count == 51:
-                break
-
+        for currow in data[row]:
             if count < start:
                 count += 1
                 continue
@@ -579,24 +572,20 @@ def process_replaytv_search(data, start=0, search=None):
             if check_key(currow, 'a') and check_key(currow, 'e') and (time_now < int(currow['a']) or time_now > int(currow['e'])):
                 continue
 
-            label = currow['orig'] + ' (ReplayTV)'
-
-            fuzz_set = fuzz.token_set_ratio(label, search)
-            fuzz_partial = fuzz.partial_ratio(label, search)
-            fuzz_sort = fuzz.token_sort_ratio(label, search)
+            rows.append(currow)
 
-            if (fuzz_set + fuzz_partial + fuzz_sort) > 160:
-                items.append(plugin.Item(
-                    label = label,
-                    properties = {"fuzz_set": fuzz_set, "fuzz_sort": fuzz_sort, "fuzz_partial": fuzz_partial, "fuzz_total": fuzz_set + fuzz_partial + fuzz_sort},
-                    path = plugin.url_for(func_or_url=replaytv_item, ids=json.dumps(currow['ids']), label=label, start=0),
-                ))
+    for label, scores, pos in get_matches(query=search, choices=((pos, currow['orig'] + ' (ReplayTV)') for pos, currow in enumerate(rows)), limit=51, source='replay'):
+        fuzz_set, fuzz_partial, fuzz_sort = scores
 
-                item_count += 1
+        items.append(plugin.Item(
+            label = label,
+            properties = {"fuzz_set": fuzz_set, "fuzz_sort": fuzz_sort, "fuzz_partial": fuzz_partial, "fuzz_total": fuzz_set + fuzz_partial + fuzz_sort},
+            path = plugin.url_for(func_or_url=replaytv_item, ids=json.dumps(rows[pos]['ids']), label=label, start=0),
+        ))
 
     return {'items': items, 'count': count}
 
-def process_replaytv_content(data, day=0, start=0):
+def process_replaytv_content(station, day=0, start=0):
     day = int(day)
     start = int(start)
     curdate = datetime.date.today() - datetime.timedelta(days=day)
@@ -607,20 +596,16 @@ def process_replaytv_content(data, day=0, start=0):
     endTime = endDate.strftime("%Y%m%d%H%M%S")
 
     items = []
-    count = 0
+    count = start
     item_count = 0
+    more = False
 
-    for row in data:
-        currow = data[row]
-
+    for pos, row, currow in replay.get_programs(source=station, start=start, start_time=startTime, end_time=endTime):
         if item_count == 51:
+            more = True
             break
 
-        if count < start:
-            count += 1
-            continue
-
-        count += 1
+        count = pos + 1
 
         if not check_key(currow, 's') or not check_key(currow, 't') or not check_key(currow, 'c') or not check_key(currow, 'e'):
             continue
@@ -675,28 +660,22 @@ def process_replaytv_content(data, day=0, start=0):
 
         item_count += 1
 
-    return {'items': items, 'count': count}
+    return {'items': items, 'count': count, 'more': more}
 
-def process_replaytv_list_content(data, ids, start=0):
+def process_replaytv_list_content(source, ids, start=0):
     start = int(start)
     items = []
-    count = 0
+    count = start
     item_count = 0
 
     ids = json.loads(ids)
     totalrows = len(ids)
 
-    for id in ids:
-        currow = data[id]
-
+    for pos, id, currow in replay.get_programs_by_id(source=source, ids=ids, start=start):
         if item_count == 51:
             break
 
-        if count < start:
-            count += 1
-            continue
-
-        count += 1
+        count = pos + 1
 
         if not check_key(currow, 's') or not check_key(currow, 't') or not check_key(currow, 'c') or not check_key(currow, 'e'):
             continue
@@ -762,4 +741,4 @@ def _sort_live(element):
     return element['chno']
 
 def _sort_replay_items(element):
-    return element.get_li().getProperty('fuzz_total')
\ No newline at end of file
+    return str(element.properties.get('fuzz_total', ''))
\ No newline at end of file
@@ -1,11 +1,12 @@
 import os, re, requests, time
 
-from resources.lib.base import gui, settings
+from resources.lib.base import gui, settings, state
 from resources.lib.base.constants import ADDON_ID, ADDON_PROFILE
 from resources.lib.base.exceptions import Error
 from resources.lib.base.log import log
+from resources.lib.base.proxy import register_stream
 from resources.lib.base.session import Session
-from resources.lib.base.util import check_key, combine_playlist, get_credentials, load_file, set_credentials, write_file
+from resources.lib.base.util import check_key, combine_playlist, get_credentials, get_local_images, load_file, set_credentials, write_file, write_playlist
 from resources.lib.language import _
 from resources.lib.util import get_image, get_play_url
 
@@ -94,20 +95,26 @@ class API(object):
 
             write_file(file="channels.json", data=data['channels'], isJSON=True)
 
-            playlist = u'#EXTM3U\n'
+            images = get_local_images()
+            playlist = []
 
             for row in sorted(data['channels'], key=lambda r: float(r.get('channelNumber', 'inf'))):
-                channeldata = self.get_channel_data(row=row)
+                channeldata = self.get_channel_data(row=row, images=images)
                 path = 'plugin://{addonid}/?_=play_video&type=channel&id={channel}&_l=.pvr'.format(addonid=ADDON_ID, channel=channeldata['channel_id'])
-                playlist += u'#EXTINF:-1 tvg-id="{id}" tvg-chno="{channel}" tvg-name="{name}" tvg-logo="{logo}" group-title="TV" radio="false",{name}\n{path}\n'.format(id=channeldata['channel_id'], channel=channeldata['channel_number'], name=channeldata['label'], logo=channeldata['station_image_large'], path=path)
+                playlist.append(u'#EXTINF:-1 tvg-id="{id}" tvg-chno="{channel}" tvg-name="{name}" tvg-logo="{logo}" group-title="TV" radio="false",{name}\n{path}\n'.format(id=channeldata['channel_id'], channel=channeldata['channel_number'], name=channeldata['label'], logo=channeldata['station_image_large'], path=path))
 
-            write_file(file="tv.m3u8", data=playlist, isJSON=False)
-            combine_playlist()
+            write_playlist(file="tv.m3u8", entries=playlist)
 
-    def get_channel_data(self, row):
-        path = ADDON_PROFILE + os.sep + "images" + os.sep + str(row['stationSchedules'][0]['station']['id']) + ".png"
+            return combine_playlist()
 
-        if os.path.isfile(path):
+    def get_channel_data(self, row, images=None):
+        if images is None:
+            images = get_local_images()
+
+        file = str(row['stationSchedules'][0]['station']['id']) + ".png"
+        path = ADDON_PROFILE + os.sep + "images" + os.sep + file
+
+        if file in images:
             image = path
         else:
             image = get_image("station-logo", row['stationSchedules'][0]['station']['images'])
@@ -124,7 +131,7 @@ class API(object):
         return channeldata
 
     def play_url(self, type, id=None):
-        playdata = {'path': '', 'license': '', 'token': '', 'locator': '', 'type': ''}
+        playdata = {'path': '', 'license': '', 'token': '', 'locator': '', 'type': '', 'hostname': ''}
 
         info = []
         urldata = None
@@ -137,8 +144,10 @@ class API(object):
             rows = load_file(file='channels.json', isJSON=True)
 
             if rows:
+                images = get_local_images()
+
                 for row in rows:
-                    channeldata = self.get_channel_data(row=row)
+                    channeldata = self.get_channel_data(row=row, images=images)
 
                     if channeldata['channel_id'] == id:
                         urldata = get_play_url(content=channeldata['stream'])
@@ -199,6 +208,8 @@ class API(object):
             gui.ok(message=_.NO_STREAM_AUTH, heading=_.PLAY_ERROR)
             return playdata
 
+        # The proxy fills in the token registered with this stream, not one shared by all streams
+        drm_token = token
         token = 'WIDEVINETOKEN'
 
         token_regex = re.search(r"(?<=;vxttoken=)(.*?)(?=/)", path)
@@ -218,37 +229,36 @@ class API(object):
                     path = '{urlpart1};vxttoken={token}/{urlpart2}'.format(urlpart1=spliturl[0], token=token, urlpart2=spliturl[1])
 
         real_url = "{hostscheme}://{hostname}".format(hostscheme=urlparse(path).scheme, hostname=urlparse(path).hostname)
-        proxy_url = "http://127.0.0.1:{proxy_port}".format(proxy_port=settings.get(key='_proxyserver_port'))
+        proxy_url = register_stream(hostname=real_url, key=locator, token=drm_token)
 
-        settings.set(key='_stream_hostname', value=real_url)
         path = path.replace(real_url, proxy_url)
 
-        playdata = {'path': path, 'license': license, 'token': token, 'locator': locator, 'info': info, 'type': type}
+        playdata = {'path': path, 'license': license, 'token': token, 'locator': locator, 'info': info, 'type': type, 'hostname': real_url}
 
         return playdata
 
     def get_play_token(self, locator, force=False):
-        if settings.getInt(key='_drm_token_age') < int(time.time() - 50) and (settings.getInt(key='_tokenrun') == 0 or settings.getInt(key='_tokenruntime') < int(time.time() - 30)):
+        if state.getInt(key='_drm_token_age') < int(time.time() - 50) and (state.getInt(key='_tokenrun') == 0 or state.getInt(key='_tokenruntime') < int(time.time() - 30)):
             force = True
 
-        if locator != settings.get(key='_drm_locator') or settings.getInt(key='_drm_token_age') < int(time.time() - 90) or force == True:
-            settings.setInt(key='_tokenrun', value=1)
-            settings.setInt(key='_tokenruntime', value=time.time())
+        if locator != state.get(key='_drm_locator') or state.getInt(key='_drm_token_age') < int(time.time() - 90) or force == True:
+            state.setInt(key='_tokenrun', value=1)
+            state.setInt(key='_tokenruntime', value=time.time())
 
             data = self.download(url=settings.get(key='_token_url'), type="post", code=[200], data={"contentLocator": locator}, json_data=True, data_return=True, return_json=True, retry=True, check_data=False)
 
             if not data or not check_key(data, 'token'):
-                settings.setInt(key="_tokenrun", value=0)
+                state.setInt(key="_tokenrun", value=0)
                 return None
 
-            settings.set(key='_drm_token', value=data['token'])
-            settings.setInt(key='_drm_token_age', value=time.time())
-            settings.set(key='_drm_locator', value=locator)
-            settings.setInt(key="_tokenrun", value=0)
+            state.set(key='_drm_token', value=data['token'])
+            state.setInt(key='_drm_token_age', value=time.time())
+            state.set(key='_drm_locator', value=locator)
+            state.setInt(key="_tokenrun", value=0)
 
             return data['token']
 
-        return settings.get(key='_drm_token')
+        return state.get(key='_drm_token')
 
     def add_to_watchlist(self, id, type):
         if type == "item":
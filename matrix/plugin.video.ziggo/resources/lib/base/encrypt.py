@@ -1,12 +1,17 @@
-import base64, hashlib, time, xbmc
+import base64, hashlib, os, tempfile, time, xbmc
 from Cryptodome import Random
 from Cryptodome.Cipher import AES
 from Cryptodome.Util import Padding
+from resources.lib.base.constants import ADDON_PROFILE, CREDENTIALS_KEY
+from resources.lib.base.files import replace_file
+
+_crypt_key = None
 
 class Credentials(object):
     def __init__(self):
         self.bs = 32
-        self.crypt_key = self.uniq_id()
+        # The service stores the key, never wait for the network interface here
+        self.crypt_key = get_crypt_key() or self.uniq_id(delay=0)
 
     def encode_credentials(self, username, password):
         if '' != username or '' != password:
@@ -64,4 +69,46 @@ class Credentials(object):
             time.sleep(delay)
             mac_addr = xbmc.getInfoLabel('Network.MacAddress')
 
-        return mac_addr
\ No newline at end of file
+        return mac_addr
+
+def get_crypt_key():
+    global _crypt_key
+
+    if not _crypt_key:
+        try:
+            with open(ADDON_PROFILE + CREDENTIALS_KEY, 'rb') as f:
+                key = f.read()
+        except (IOError, OSError):
+            return None
+
+        if len(key) == 32:
+            _crypt_key = key
+
+    return _crypt_key
+
+def store_crypt_key():
+    global _crypt_key
+
+    key = Credentials().uniq_id()
+
+    if key == get_crypt_key():
+        return
+
+    if not os.path.isdir(ADDON_PROFILE):
+        os.makedirs(ADDON_PROFILE)
+
+    # mkstemp creates the file readable by the owner only
+    fd, tmp = tempfile.mkstemp(prefix='credentials', dir=ADDON_PROFILE)
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+
+        replace_file(tmp, ADDON_PROFILE + CREDENTIALS_KEY)
+    except:
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+
+        raise
+
+    _crypt_key = key
\ No newline at end of file
@@ -1,12 +1,13 @@
 import requests, sys
 
-from resources.lib.base import settings
+from requests.adapters import HTTPAdapter
+from resources.lib.base import settings, state
 from resources.lib.base.constants import SESSION_CHUNKSIZE
 from resources.lib.base.log import log
 from resources.lib.constants import CONST_BASE_HEADERS
 
 class Session(requests.Session):
-    def __init__(self, headers=None, cookies_key=None, base_url='{}', timeout=None, attempts=None):
+    def __init__(self, headers=None, cookies_key=None, base_url='{}', timeout=None, attempts=None, pool_size=None, persist_cookies=True):
         super(Session, self).__init__()
 
         user_agent = settings.get(key='_user_agent')
@@ -17,14 +18,20 @@ class Session(requests.Session):
 
         self._headers = CONST_BASE_HEADERS or {}
         self._cookies_key = cookies_key
+        self._persist_cookies = persist_cookies
         self._base_url = base_url
         self._timeout = timeout or (5, 10)
         self._attempts = attempts or 2
 
         self.headers.update(self._headers)
 
+        if pool_size:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.mount('http://', adapter)
+            self.mount('https://', adapter)
+
         if self._cookies_key:
-            self.cookies.update(settings.getDict(self._cookies_key, {}))
+            self.load_cookies()
 
     def request(self, method, url, timeout=None, attempts=None, **kwargs):
         if not url.startswith('http'):
@@ -44,7 +51,7 @@ class Session(requests.Session):
             try:
                 data = super(Session, self).request(method, url, **kwargs)
 
-                if self._cookies_key:
+                if self._cookies_key and self._persist_cookies:
                     self.save_cookies()
 
                 return data
@@ -52,15 +59,21 @@ class Session(requests.Session):
                 if i == attempts:
                     raise
 
+    def load_cookies(self):
+        if not self._cookies_key:
+            raise Exception('A cookies key needs to be set to load cookies')
+
+        self.cookies.update(state.getDict(self._cookies_key, {}))
+
     def save_cookies(self):
         if not self._cookies_key:
             raise Exception('A cookies key needs to be set to save cookies')
 
-        settings.setDict(self._cookies_key, self.cookies.get_dict())
+        state.setDict(self._cookies_key, self.cookies.get_dict())
 
     def clear_cookies(self):
         if self._cookies_key:
-            settings.remove(self._cookies_key)
+            state.remove(self._cookies_key)
 
         self.cookies.clear()
 
@@ -41,6 +41,28 @@ class DetectorsHub(dict):
             if d.can_register:
                 self.register(d)
 
+        self.compileWords()
+
+    def compileWords(self):
+        """
+        Map every look_for word to the detectors using it, so an agent is
+        only run through the detectors that can match it
+        """
+        self.ordered = [detector for typ in self._known_types for detector in self[typ]]
+        self.word_detectors = {}
+        for rank, detector in enumerate(self.ordered):
+            for word in detector.words:
+                self.word_detectors.setdefault(word, set()).add(rank)
+        self.words = tuple(self.word_detectors)
+
+    def candidates(self, agent):
+        # -> detectors with a look_for word in agent, in detection order
+        ranks = set()
+        for word in self.words:
+            if word in agent:
+                ranks.update(self.word_detectors[word])
+        return [self.ordered[rank] for rank in sorted(ranks)]
+
 
 class DetectorBase(object):
     name = ""  # "to perform match in DetectorsHub object"
@@ -60,6 +82,7 @@ class DetectorBase(object):
         if not self.name:
             self.name = self.__class__.__name__
         self.can_register = (self.__class__.__dict__.get('can_register', True))
+        self.words = tuple(self.look_for) if isinstance(self.look_for, (tuple, list)) else (self.look_for,)
 
     def detect(self, agent, result):
         # -> True/None
@@ -651,21 +674,42 @@ class prefs:  # experimental
 
 detectorshub = DetectorsHub()
 
+_detect_cache = {}
+_detect_cache_size = 128
+
 
 def detect(agent, fill_none=False):
     """
     fill_none: if name/version is not detected respective key is still added to the result with value None
     """
+    try:
+        result = _detect_cache.get((agent, fill_none))
+    except TypeError:
+        return _detect(agent, fill_none)
+
+    if result is None:
+        result = _detect(agent, fill_none)
+        if len(_detect_cache) >= _detect_cache_size:
+            _detect_cache.clear()
+        _detect_cache[(agent, fill_none)] = result
+
+    # Callers get a copy, the cached result must stay untouched
+    return dict((key, dict(value) if isinstance(value, dict) else value) for key, value in result.items())
+
+
+def _detect(agent, fill_none=False):
     result = dict(platform=dict(name=None, version=None))
-    _suggested_detectors = []
-
-    for info_type in detectorshub:
-        detectors = _suggested_detectors or detectorshub[info_type]
-        for detector in detectors:
-            try:
-                detector.detect(agent, result)
-            except Exception as _err:
-                pass
+
+    try:
+        detectors = detectorshub.candidates(agent)
+    except TypeError:
+        detectors = detectorshub.ordered
+
+    for detector in detectors:
+        try:
+            detector.detect(agent, result)
+        except Exception as _err:
+            pass
 
     if fill_none:
         for outer_key in ('os', 'browser'):
@@ -13,6 +13,10 @@ default_scorer = fuzz.WRatio
 default_processor = utils.full_process
 
 
+def _no_process(x):
+    return x
+
+
 def extractWithoutOrder(query, choices, processor=default_processor, scorer=default_scorer, score_cutoff=0):
     """Select the best match in a list or dictionary of choices.
 
@@ -283,3 +287,296 @@ def dedupe(contains_dupes, threshold=70, scorer=fuzz.token_set_ratio):
         return contains_dupes
     else:
         return extractor
+
+
+def _ratio_bound(s1, s2):
+    """Upper bound of fuzz.ratio() from the string lengths alone"""
+    if s1 is None or s2 is None:
+        return 0
+    if s1 == s2:
+        return 100
+    if not s1 or not s2:
+        return 0
+    return utils.intr(200.0 * min(len(s1), len(s2)) / (len(s1) + len(s2)))
+
+
+class _Processed(object):
+    """A query or choice with the derived strings needed by the scorers,
+    each computed once on first use"""
+
+    def __init__(self, value, base):
+        self.value = value
+        self.base = base
+        self.cache = {}
+
+    def full(self, force_ascii):
+        key = ('full', force_ascii)
+        if key not in self.cache:
+            self.cache[key] = utils.full_process(self.base, force_ascii=force_ascii)
+        return self.cache[key]
+
+    def tokens(self, force_ascii):
+        key = ('tokens', force_ascii)
+        if key not in self.cache:
+            self.cache[key] = set(self.full(force_ascii).split())
+        return self.cache[key]
+
+    def sorted(self, force_ascii):
+        key = ('sorted', force_ascii)
+        if key not in self.cache:
+            self.cache[key] = u" ".join(sorted(self.full(force_ascii).split())).strip()
+        return self.cache[key]
+
+    def chars(self):
+        if 'chars' not in self.cache:
+            counts = {}
+            for c in self.value:
+                counts[c] = counts.get(c, 0) + 1
+            self.cache['chars'] = counts
+        return self.cache['chars']
+
+
+def _token_set_strings(p1, p2, force_ascii):
+    """The three strings compared by fuzz.token_set_ratio()"""
+    tokens1 = p1.tokens(force_ascii)
+    tokens2 = p2.tokens(force_ascii)
+
+    sorted_sect = u" ".join(sorted(tokens1.intersection(tokens2)))
+    sorted_1to2 = u" ".join(sorted(tokens1.difference(tokens2)))
+    sorted_2to1 = u" ".join(sorted(tokens2.difference(tokens1)))
+
+    combined_1to2 = (sorted_sect + u" " + sorted_1to2).strip()
+    combined_2to1 = (sorted_sect + u" " + sorted_2to1).strip()
+
+    return sorted_sect.strip(), combined_1to2, combined_2to1
+
+
+class _Scorer(object):
+    """How a scorer reads a processed query and choice
+
+    ``bound`` returns an upper bound of the score that is much cheaper than
+    the score itself, or None when no bound is known.
+    """
+
+    def __init__(self, scorer):
+        self.scorer = scorer
+        self.force_ascii = scorer not in [fuzz.UWRatio, fuzz.UQRatio]
+
+        if scorer in [fuzz.token_sort_ratio, fuzz.ratio, fuzz.QRatio]:
+            self.cost = 1
+        elif scorer == fuzz.token_set_ratio:
+            self.cost = 2
+        elif scorer == fuzz.partial_ratio:
+            self.cost = 3
+        else:
+            self.cost = 4
+
+        if scorer in [fuzz.WRatio, fuzz.QRatio,
+                      fuzz.token_set_ratio, fuzz.token_sort_ratio,
+                      fuzz.partial_token_set_ratio, fuzz.partial_token_sort_ratio,
+                      fuzz.UWRatio, fuzz.UQRatio]:
+            self.processed = True
+            self.func = partial(scorer, full_process=False)
+        else:
+            self.processed = False
+            self.func = scorer
+
+    def bound(self, p1, p2):
+        if self.scorer == fuzz.token_sort_ratio:
+            return _ratio_bound(p1.sorted(True), p2.sorted(True))
+
+        if self.scorer == fuzz.token_set_ratio:
+            s1, s2 = p1.full(True), p2.full(True)
+            if s1 == s2:
+                return 100
+            if not s1 or not s2:
+                return 0
+            sorted_sect, combined_1to2, combined_2to1 = _token_set_strings(p1, p2, True)
+            return max(_ratio_bound(sorted_sect, combined_1to2),
+                       _ratio_bound(sorted_sect, combined_2to1),
+                       _ratio_bound(combined_1to2, combined_2to1))
+
+        if self.scorer in [fuzz.ratio, fuzz.QRatio]:
+            if self.processed:
+                return _ratio_bound(p1.full(True), p2.full(True))
+            return _ratio_bound(p1.value, p2.value)
+
+        if self.scorer == fuzz.partial_ratio:
+            if p1.value is None or p2.value is None:
+                return 0
+            if p1.value == p2.value:
+                return 100
+            if not p1.value or not p2.value:
+                return 0
+            # No window of the longer string can share more characters with
+            # the shorter one than the whole longer string does
+            chars1, chars2 = p1.chars(), p2.chars()
+            overlap = sum(min(count, chars2.get(c, 0)) for c, count in chars1.items())
+            if not overlap:
+                return 0
+            r = 2.0 * overlap / (min(len(p1.value), len(p2.value)) + overlap)
+            return 100 if r > .995 else utils.intr(100 * r)
+
+        return None
+
+    def score(self, p1, p2):
+        if self.scorer == fuzz.token_sort_ratio:
+            return fuzz.ratio(p1.sorted(True), p2.sorted(True))
+
+        if self.scorer == fuzz.token_set_ratio:
+            s1, s2 = p1.full(True), p2.full(True)
+            if s1 == s2:
+                return 100
+            if not utils.validate_string(s1) or not utils.validate_string(s2):
+                return 0
+            sorted_sect, combined_1to2, combined_2to1 = _token_set_strings(p1, p2, True)
+            return max(fuzz.ratio(sorted_sect, combined_1to2),
+                       fuzz.ratio(sorted_sect, combined_2to1),
+                       fuzz.ratio(combined_1to2, combined_2to1))
+
+        if self.processed:
+            return self.func(p1.full(self.force_ascii), p2.full(self.force_ascii))
+
+        return self.func(p1.value, p2.value)
+
+
+class ChoiceSet(object):
+    """A list or dictionary of choices prepared once for many queries.
+
+    The processor is applied to every choice when the set is created, and
+    the processed strings, sorted tokens and token sets the scorers need
+    are kept with each choice. The extract functions below work like the
+    ones in this module and return the same matches and scores, but for
+    fuzz.ratio, QRatio, partial_ratio, token_sort_ratio and
+    token_set_ratio they first compute a cheap upper bound of the score
+    (from the string lengths, shared tokens or shared characters) and skip
+    every choice that can not reach the score cutoff or, when a limit is
+    given, beat the current limit-th best match.
+
+    The scorer can also be a tuple of scorers. The score of a match is
+    then the tuple of their scores, and the cutoff and ordering use their
+    sum.
+
+    Arguments:
+        choices: An iterable or dictionary-like object containing choices.
+        processor: Optional function of the form f(a) -> b, applied to the
+            query and to every choice. See extractWithoutOrder().
+        prepared: Optional dictionary of choices prepared by earlier
+            ChoiceSets with the same processor. Choices found in it are
+            not processed again, new ones are added to it, so the derived
+            strings are reused by every set built from it.
+    """
+
+    def __init__(self, choices, processor=default_processor, prepared=None):
+        if processor is None:
+            processor = _no_process
+
+        self.processor = processor
+
+        try:
+            items = list(choices.items())
+            self.keyed = True
+        except AttributeError:
+            items = [(None, choice) for choice in choices]
+            self.keyed = False
+
+        self.keys = [key for key, choice in items]
+        self.choices = [choice for key, choice in items]
+        if prepared is None:
+            self.processed = [self._process(choice) for choice in self.choices]
+        else:
+            self.processed = [self._prepare(choice, prepared) for choice in self.choices]
+
+    def __len__(self):
+        return len(self.choices)
+
+    def _process(self, value):
+        processed = self.processor(value)
+
+        # Don't run full_process twice
+        return _Processed(processed, value if self.processor == utils.full_process else processed)
+
+    def _prepare(self, choice, prepared):
+        try:
+            return prepared[choice]
+        except KeyError:
+            processed = prepared[choice] = self._process(choice)
+            return processed
+        except TypeError:
+            return self._process(choice)
+
+    def _result(self, index, score):
+        if self.keyed:
+            return (self.choices[index], score, self.keys[index])
+        return (self.choices[index], score)
+
+    def _matches(self, query, scorer, score_cutoff, limit=None):
+        """Yield (index, score, total) for every match in choice order or,
+        with a limit, for the best matches only"""
+        multiple = isinstance(scorer, (list, tuple))
+        scorers = [_Scorer(func) for func in (scorer if multiple else [scorer])]
+        order = sorted(range(len(scorers)), key=lambda i: scorers[i].cost)
+        processed_query = self._process(query)
+        best = []
+
+        if len(processed_query.value) == 0:
+            logging.warning(u"Applied processor reduces input query to empty string, "
+                            "all comparisons will have score 0. "
+                            "[Query: \'{0}\']".format(query))
+
+        for index, processed in enumerate(self.processed):
+            # Earlier choices win ties, so a new one must beat the worst kept
+            floor = best[0][0] if limit and len(best) == limit else None
+            bounds = [s.bound(processed_query, processed) for s in scorers]
+            scores = list(bounds)
+
+            for i in order:
+                if None not in scores:
+                    total = sum(scores)
+                    if total < score_cutoff or (floor is not None and total <= floor):
+                        break
+                scores[i] = scorers[i].score(processed_query, processed)
+            else:
+                total = sum(scores)
+                if total < score_cutoff or (floor is not None and total <= floor):
+                    continue
+
+                score = tuple(scores) if multiple else scores[0]
+
+                if limit is None:
+                    yield index, score, total
+                elif len(best) < limit:
+                    heapq.heappush(best, (total, -index, score))
+                else:
+                    heapq.heapreplace(best, (total, -index, score))
+
+        for total, index, score in sorted(best, reverse=True):
+            yield -index, score, total
+
+    def extractWithoutOrder(self, query, scorer=default_scorer, score_cutoff=0):
+        """Generator of (choice, score) or (choice, score, key) tuples of
+        every choice scoring at least score_cutoff, in choice order.
+        See extractWithoutOrder() for the arguments."""
+        for index, score, total in self._matches(query, scorer, score_cutoff):
+            yield self._result(index, score)
+
+    def extractBests(self, query, scorer=default_scorer, score_cutoff=0, limit=5):
+        """List of the best (choice, score) or (choice, score, key) tuples,
+        best first. See extractBests() for the arguments."""
+        if limit is None:
+            matches = sorted(self._matches(query, scorer, score_cutoff), key=lambda i: i[2], reverse=True)
+        elif limit <= 0:
+            return []
+        else:
+            matches = self._matches(query, scorer, score_cutoff, limit)
+
+        return [self._result(index, score) for index, score, total in matches]
+
+    def extract(self, query, scorer=default_scorer, limit=5):
+        """See extract()."""
+        return self.extractBests(query, scorer=scorer, limit=limit)
+
+    def extractOne(self, query, scorer=default_scorer, score_cutoff=0):
+        """See extractOne()."""
+        best = self.extractBests(query, scorer=scorer, score_cutoff=score_cutoff, limit=1)
+        return best[0] if best else None
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+py_levenshtein.py
+
+Pure-python replacement for the parts of python-Levenshtein used by
+StringMatcher, for platforms where the C extension is not available.
+
+Distances are computed with the bit-parallel algorithms of Myers and
+Hyyrö, one bit per character of the shorter string, and edit
+operations are traced back in the same order as the C implementation so
+that matching blocks, and therefore all scores, are identical.
+"""
+
+__all__ = ['distance', 'editops', 'matching_blocks', 'opcodes', 'ratio']
+
+try:
+    _popcount = int.bit_count
+except AttributeError:
+    def _popcount(value):
+        return bin(value).count('1')
+
+
+def _pattern(s):
+    masks = {}
+    get = masks.get
+    bit = 1
+
+    for c in s:
+        masks[c] = get(c, 0) | bit
+        bit <<= 1
+
+    return masks
+
+
+def _length(value):
+    if isinstance(value, int):
+        return value
+
+    return len(value)
+
+
+def _lcs(s1, s2):
+    """Length of the longest common subsequence (Hyyrö 2004)"""
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    if not s2:
+        return 0
+
+    get = _pattern(s2).get
+    full = (1 << len(s2)) - 1
+    v = full
+
+    # Carries only move upwards, so the bits above s2 can be masked once
+    for c in s1:
+        m = get(c)
+
+        if m:
+            u = v & m
+            v = (v + u) | (v - u)
+
+    return len(s2) - _popcount(v & full)
+
+
+def _rows(s1, s2):
+    """Vertical and horizontal deltas of every row of the cost matrix
+
+    Row i of the Levenshtein matrix of s1 against s2 is encoded by bit j - 1
+    of vp[i] / vn[i] (D[i][j] - D[i][j - 1] is +1 / -1) and of hp[i] / hn[i]
+    (D[i][j] - D[i - 1][j] is +1 / -1).
+    """
+    masks = _pattern(s2)
+    full = (1 << len(s2)) - 1
+    vp = [full]
+    vn = [0]
+    hp = [full]
+    hn = [0]
+
+    for c in s1:
+        pv = vp[-1]
+        mv = vn[-1]
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        hp.append(ph)
+        hn.append(mh)
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        vp.append((mh | ~(xv | ph)) & full)
+        vn.append(ph & xv)
+
+    return vp, vn, hp, hn
+
+
+def distance(s1, s2):
+    """Levenshtein distance between s1 and s2 (Hyyrö 2001)"""
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    if not s2:
+        return len(s1)
+
+    masks = _pattern(s2)
+    full = (1 << len(s2)) - 1
+    last = 1 << (len(s2) - 1)
+    pv = full
+    mv = 0
+    result = len(s2)
+
+    for c in s1:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+
+        if ph & last:
+            result += 1
+        elif mh & last:
+            result -= 1
+
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+
+    return result
+
+
+def ratio(s1, s2):
+    """Similarity of s1 and s2 between 0 and 1, substitutions costing 2"""
+    lensum = len(s1) + len(s2)
+
+    if not lensum:
+        return 1.0
+
+    return float(2 * _lcs(s1, s2)) / lensum
+
+
+def _editops(s1, s2):
+    prefix = 0
+
+    while prefix < len(s1) and prefix < len(s2) and s1[prefix] == s2[prefix]:
+        prefix += 1
+
+    len1 = len(s1)
+    len2 = len(s2)
+
+    while len1 > prefix and len2 > prefix and s1[len1 - 1] == s2[len2 - 1]:
+        len1 -= 1
+        len2 -= 1
+
+    a = s1[prefix:len1]
+    b = s2[prefix:len2]
+
+    if not a and not b:
+        return []
+
+    vp, vn, hp, hn = _rows(a, b)
+    ops = []
+    i = len(a)
+    j = len(b)
+    direction = 0
+
+    # Walk back from the bottom right corner with the preferences of
+    # editops_from_cost_matrix() in python-Levenshtein
+    while i or j:
+        bit = 1 << (j - 1) if j else 0
+        left = j and vp[i] & bit
+        up = i and (not j or hp[i] & bit)
+
+        if direction < 0 and left:
+            j -= 1
+            ops.append(('insert', i + prefix, j + prefix))
+            continue
+
+        if direction > 0 and up:
+            i -= 1
+            ops.append(('delete', i + prefix, j + prefix))
+            continue
+
+        if i and j and a[i - 1] == b[j - 1]:
+            i -= 1
+            j -= 1
+            direction = 0
+            continue
+
+        if i and j:
+            diagonal = (1 if hp[i] & bit else -1 if hn[i] & bit else 0) + (1 if vp[i - 1] & bit else -1 if vn[i - 1] & bit else 0)
+
+            if diagonal == 1:
+                i -= 1
+                j -= 1
+                ops.append(('replace', i + prefix, j + prefix))
+                direction = 0
+                continue
+
+        if direction == 0 and left:
+            j -= 1
+            ops.append(('insert', i + prefix, j + prefix))
+            direction = -1
+            continue
+
+        if direction == 0 and up:
+            i -= 1
+            ops.append(('delete', i + prefix, j + prefix))
+            direction = 1
+            continue
+
+        raise AssertionError('lost in the cost matrix')
+
+    ops.reverse()
+
+    return ops
+
+
+def _editops_to_opcodes(ops, len1, len2):
+    blocks = []
+    spos = dpos = 0
+    i = 0
+
+    while i < len(ops):
+        tag, s, d = ops[i]
+
+        if spos < s or dpos < d:
+            blocks.append(('equal', spos, s, dpos, d))
+            spos, dpos = s, d
+
+        sbeg, dbeg = spos, dpos
+
+        while True:
+            if tag != 'insert':
+                spos += 1
+            if tag != 'delete':
+                dpos += 1
+
+            i += 1
+
+            if i >= len(ops) or ops[i] != (tag, spos, dpos):
+                break
+
+        blocks.append((tag, sbeg, spos, dbeg, dpos))
+
+    if spos < len1 or dpos < len2:
+        blocks.append(('equal', spos, len1, dpos, len2))
+
+    return blocks
+
+
+def _opcodes_to_editops(blocks):
+    ops = []
+
+    for tag, sbeg, send, dbeg, dend in blocks:
+        if tag == 'replace':
+            ops.extend((tag, sbeg + k, dbeg + k) for k in range(send - sbeg))
+        elif tag == 'delete':
+            ops.extend((tag, sbeg + k, dbeg) for k in range(send - sbeg))
+        elif tag == 'insert':
+            ops.extend((tag, sbeg, dbeg + k) for k in range(dend - dbeg))
+
+    return ops
+
+
+def editops(*args):
+    """editops(source, destination) or editops(opcodes, source, destination)"""
+    if len(args) == 3:
+        return _opcodes_to_editops(args[0])
+
+    return _editops(*args)
+
+
+def opcodes(*args):
+    """opcodes(source, destination) or opcodes(editops, source, destination)"""
+    if len(args) == 3:
+        ops, s1, s2 = args
+    else:
+        s1, s2 = args
+        ops = _editops(s1, s2)
+
+    return _editops_to_opcodes(ops, _length(s1), _length(s2))
+
+
+def matching_blocks(edits, s1, s2):
+    """Matching blocks from editops or opcodes, as in difflib"""
+    len1 = _length(s1)
+    len2 = _length(s2)
+
+    if not edits or len(edits[0]) == 3:
+        edits = _editops_to_opcodes(edits, len1, len2)
+
+    blocks = [(sbeg, dbeg, send - sbeg) for tag, sbeg, send, dbeg, dend in edits if tag == 'equal']
+    blocks.append((len1, len2, 0))
+
+    return blocks
@@ -0,0 +1,3 @@
+import env
+
+env.setup()
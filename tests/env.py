@@ -0,0 +1,18 @@
+# Makes the add-on code importable outside Kodi: the py3 tree runs under Python 3, the py2 tree under Python 2
+
+import os, sys
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+TREE = os.path.join(ROOT, 'matrix' if sys.version_info >= (3, 0) else 'leia')
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+
+def setup(addon_id='plugin.video.kpn'):
+    for path in (os.path.join(TREE, 'script.module.fuzzywuzzy', 'lib'), os.path.join(TREE, addon_id), os.path.join(ROOT, 'tests', 'kodi')):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    # Kodi passes the plugin url, handle and query string
+    sys.argv = ['plugin://{0}/'.format(addon_id), '1', '']
+
+def fixture(*parts):
+    return os.path.join(FIXTURES, *parts)
@@ -0,0 +1,52 @@
+# Minimal stand-in for the Kodi xbmc module, enough to import the add-on code outside Kodi
+
+LOGDEBUG, LOGINFO, LOGWARNING, LOGERROR, LOGFATAL, LOGNONE = 0, 1, 2, 3, 4, 5
+ISO_639_1 = 0
+
+INFO_LABELS = {
+    'System.BuildVersion': '19.1 Git:20210509-85e05228b4',
+}
+
+def log(msg, level=LOGDEBUG):
+    pass
+
+def translatePath(path):
+    return path
+
+def getInfoLabel(label):
+    return INFO_LABELS.get(label, '')
+
+def getLanguage(format=None, region=False):
+    return 'en'
+
+def getCondVisibility(condition):
+    return False
+
+def getLocalizedString(id):
+    return str(id)
+
+def executebuiltin(function, wait=False):
+    pass
+
+def executeJSONRPC(request):
+    return '{}'
+
+def sleep(time):
+    pass
+
+class Monitor(object):
+    def abortRequested(self):
+        return False
+
+    def waitForAbort(self, timeout=0):
+        return False
+
+class Player(object):
+    def play(self, item='', listitem=None, windowed=False, startpos=-1):
+        pass
+
+    def isPlaying(self):
+        return False
+
+    def isPlayingVideo(self):
+        return False
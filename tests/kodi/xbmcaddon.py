@@ -0,0 +1,37 @@
+# Minimal stand-in for the Kodi xbmcaddon module, settings live in memory and the profile in a temporary directory
+
+import os, sys, tempfile
+
+ADDON_ID = 'plugin.video.kpn'
+ADDON_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'matrix' if sys.version_info >= (3, 0) else 'leia', ADDON_ID)) + os.sep
+# Set KODI_PROFILE to share a profile between processes, the way the plugin and the service do
+PROFILE = os.environ.get('KODI_PROFILE') or tempfile.mkdtemp(prefix='kodi-profile-') + os.sep
+
+SETTINGS = {}
+
+class Addon(object):
+    def __init__(self, id=ADDON_ID):
+        self._id = id or ADDON_ID
+
+    def getAddonInfo(self, id):
+        return {
+            'id': self._id,
+            'name': self._id,
+            'version': '0.0.0',
+            'path': ADDON_PATH,
+            'profile': PROFILE,
+            'icon': ADDON_PATH + 'icon.png',
+            'fanart': ADDON_PATH + 'fanart.jpg',
+        }.get(id, '')
+
+    def getSetting(self, id):
+        return SETTINGS.get(id, '')
+
+    def setSetting(self, id, value):
+        SETTINGS[id] = value
+
+    def getLocalizedString(self, id):
+        return str(id)
+
+    def openSettings(self):
+        pass
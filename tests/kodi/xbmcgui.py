@@ -0,0 +1,29 @@
+# Minimal stand-in for the Kodi xbmcgui module, list items only record what is set on them
+
+ALPHANUM_HIDE_INPUT = 2
+
+class ListItem(object):
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        self.label = label
+        self.path = path
+        self.properties = {}
+        self.calls = []
+
+    def setProperty(self, key, value):
+        self.properties[key] = value
+
+    def getProperty(self, key):
+        return self.properties.get(key, '')
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append(name)
+
+        return call
+
+class Dialog(object):
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+class DialogProgress(Dialog):
+    pass
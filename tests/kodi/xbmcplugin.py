@@ -0,0 +1,28 @@
+# Minimal stand-in for the Kodi xbmcplugin module, directory items are collected in ITEMS
+
+SORT_METHOD_UNSORTED, SORT_METHOD_LABEL, SORT_METHOD_DATEADDED = 0, 1, 21
+
+ITEMS = []
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    ITEMS.append((url, listitem, isFolder))
+    return True
+
+def addDirectoryItems(handle, items, totalItems=0):
+    ITEMS.extend(items)
+    return True
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    pass
+
+def setResolvedUrl(handle, succeeded, listitem):
+    pass
+
+def setContent(handle, content):
+    pass
+
+def setPluginCategory(handle, category):
+    pass
+
+def addSortMethod(handle, sortMethod, label2Mask=''):
+    pass
@@ -0,0 +1,91 @@
+# Implementations as they were before the optimisations, kept to check that the new code gives the same results
+
+import re
+
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+def set_duration(xml, duration=0, add_duration=0):
+    try:
+        if duration and duration > 0:
+            given_duration = 0
+            matched = False
+            duration += add_duration
+
+            regex = r"mediaPresentationDuration=\"PT([0-9]*)M([0-9]*)[0-9.]*S\""
+            matches2 = re.finditer(regex, xml, re.MULTILINE)
+
+            if len([i for i in matches2]) > 0:
+                matches = re.finditer(regex, xml, re.MULTILINE)
+                matched = True
+            else:
+                regex2 = r"mediaPresentationDuration=\"PT([0-9]*)H([0-9]*)M([0-9]*)[0-9.]*S\""
+                matches3 = re.finditer(regex2, xml, re.MULTILINE)
+
+                if len([i for i in matches3]) > 0:
+                    matches = re.finditer(regex2, xml, re.MULTILINE)
+                    matched = True
+                else:
+                    regex3 = r"mediaPresentationDuration=\"PT([0-9]*)D([0-9]*)H([0-9]*)M([0-9]*)[0-9.]*S\""
+                    matches4 = re.finditer(regex3, xml, re.MULTILINE)
+
+                    if len([i for i in matches4]) > 0:
+                        matches = re.finditer(regex3, xml, re.MULTILINE)
+                        matched = True
+
+            if matched == True:
+                given_day = 0
+                given_hour = 0
+                given_minute = 0
+                given_second = 0
+
+                for matchNum, match in enumerate(matches, start=1):
+                    if len(match.groups()) == 2:
+                        given_minute = int(match.group(1))
+                        given_second = int(match.group(2))
+                    elif len(match.groups()) == 3:
+                        given_hour = int(match.group(1))
+                        given_minute = int(match.group(2))
+                        given_second = int(match.group(3))
+                    elif len(match.groups()) == 4:
+                        given_day = int(match.group(1))
+                        given_hour = int(match.group(2))
+                        given_minute = int(match.group(3))
+                        given_second = int(match.group(4))
+
+                given_duration = (given_day * 24* 60 * 60) + (given_hour * 60 * 60) + (given_minute * 60) + given_second
+
+            if not given_duration > 0 or given_duration > duration:
+                minute, second = divmod(duration, 60)
+                hour, minute = divmod(minute, 60)
+
+                regex4 = r"mediaPresentationDuration=\"[a-zA-Z0-9.]*\""
+                subst = "mediaPresentationDuration=\"PT{hour}H{minute}M{second}S\"".format(hour=hour, minute=minute, second=second)
+                regex5 = r"duration=\"[a-zA-Z0-9.]*\">"
+                subst2 = "duration=\"PT{hour}H{minute}M{second}S\">".format(hour=hour, minute=minute, second=second)
+
+                xml = re.sub(regex4, subst, xml, 0, re.MULTILINE)
+                xml = re.sub(regex5, subst2, xml, 0, re.MULTILINE)
+    except:
+        pass
+
+    return xml
+
+def build_url(url, addon_id, encode_obj, **kwargs):
+    kwargs['_'] = url
+    is_live = kwargs.pop('_is_live', False)
+
+    params = []
+    for k in sorted(kwargs):
+        if kwargs[k] == None:
+            continue
+
+        try: params.append((k, str(kwargs[k]).encode('utf-8')))
+        except: params.append((k, kwargs[k]))
+
+    if is_live:
+        params.append(('_l', '.pvr'))
+
+    return 'plugin://{0}/?{1}'.format(addon_id, urlencode(encode_obj(params)))
@@ -0,0 +1,57 @@
+import os, stat, sys, pytest
+
+from resources.lib.base import files, replay, settings, util
+from resources.lib.base.constants import ADDON_PROFILE, REPLAY_DB
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith('win'), reason='Windows has no POSIX permissions')
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def remove(path):
+    if os.path.isfile(path):
+        os.remove(path)
+
+def test_read_umask_stores_umask():
+    umask = os.umask(0o027)
+
+    try:
+        files.read_umask()
+    finally:
+        os.umask(umask)
+
+    assert settings.getInt(key='_umask') == 0o027
+
+def test_write_file_follows_umask():
+    remove(ADDON_PROFILE + 'mode.json')
+    settings.setInt(key='_umask', value=0o027)
+
+    util.write_file(file='mode.json', data={'a': 1}, isJSON=True)
+
+    assert mode(ADDON_PROFILE + 'mode.json') == 0o640
+    assert util.load_file(file='mode.json', isJSON=True) == {'a': 1}
+
+def test_write_file_keeps_mode():
+    util.write_file(file='mode.json', data={'a': 1}, isJSON=True)
+    os.chmod(ADDON_PROFILE + 'mode.json', 0o600)
+
+    util.write_file(file='mode.json', data={'a': 2}, isJSON=True)
+
+    assert mode(ADDON_PROFILE + 'mode.json') == 0o600
+    assert util.load_file(file='mode.json', isJSON=True) == {'a': 2}
+
+def test_umask_defaults_before_service_startup():
+    remove(ADDON_PROFILE + 'mode.json')
+    settings.setInt(key='_umask', value=-1)
+
+    util.write_file(file='mode.json', data={'a': 1}, isJSON=True)
+
+    assert mode(ADDON_PROFILE + 'mode.json') == 0o666 & ~files.DEFAULT_UMASK
+
+def test_replay_db_keeps_mode():
+    replay.ingest()
+    os.chmod(ADDON_PROFILE + REPLAY_DB, 0o640)
+
+    replay.ingest()
+
+    assert mode(ADDON_PROFILE + REPLAY_DB) == 0o640
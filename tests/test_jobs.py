@@ -0,0 +1,49 @@
+import threading, time, pytest
+
+from resources.lib.base import jobs
+from resources.lib.base.jobs import Job, run_jobs
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+
+    event.set()
+
+    for job in jobs._stuck:
+        job.thread.join()
+
+    jobs._stuck[:] = []
+
+def test_runs_jobs_after_their_dependencies():
+    order = []
+
+    def first():
+        order.append('first')
+
+    def second():
+        order.append('second')
+
+    assert run_jobs([Job(second, after=[first]), Job(first)], workers=2)
+    assert order == ['first', 'second']
+
+def test_gives_up_when_only_stuck_threads_hold_the_workers(release):
+    def hangs():
+        release.wait()
+
+    def quick():
+        pass
+
+    assert not run_jobs([Job(hangs, timeout=0.1)], workers=1)
+    assert len(jobs._stuck) == 1
+
+    start = time.time()
+
+    assert not run_jobs([Job(quick, timeout=0.5)], workers=1)
+    assert time.time() - start < 5
+
+    release.set()
+    jobs._stuck[0].thread.join()
+
+    assert run_jobs([Job(quick)], workers=1)
+    assert jobs._stuck == []
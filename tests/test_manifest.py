@@ -0,0 +1,69 @@
+import io
+
+from env import fixture
+from resources.lib.base.manifest import DropCodecs, LimitRepresentations, SetBaseURL, rewrite_manifest
+from xml.etree import ElementTree
+
+NS = '{urn:mpeg:dash:schema:mpd:2011}'
+
+def load(name):
+    with io.open(fixture('manifest', name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def parse(xml):
+    return ElementTree.fromstring(xml.encode('utf-8'))
+
+def representations(root):
+    return [[rep.get('id') for rep in adaptation_set.findall(NS + 'Representation')] for adaptation_set in root.iter(NS + 'AdaptationSet')]
+
+def test_without_filters_returns_document():
+    xml = load('channels.mpd')
+
+    assert rewrite_manifest(xml) == xml
+
+def test_keeps_declaration_and_comments():
+    xml = rewrite_manifest(load('channels.mpd'), filters=[LimitRepresentations(max_height=4320)])
+
+    assert xml.startswith('<?xml version="1.0" encoding="UTF-8"?>\n<!-- Generated by the packager -->\n<MPD ')
+    assert '<!-- Video -->' in xml
+    assert '<!-- Audio -->' in xml
+    assert xml.endswith('</MPD>\n')
+    assert representations(parse(xml)) == representations(parse(load('channels.mpd')))
+
+def test_drop_codecs_keeps_other_representations():
+    root = parse(rewrite_manifest(load('channels.mpd'), filters=[DropCodecs(codecs=['ac-3'])]))
+
+    # Only the ac-3 stream leaves the mixed Dutch set, the English set lost its only stream and the German set is ac-3 as a whole
+    assert representations(root) == [['v0', 'v1', 'v2', 'v3'], ['u0', 'u1'], ['a1']]
+    assert [adaptation_set.get('lang') for adaptation_set in root.iter(NS + 'AdaptationSet')] == [None, None, 'nl']
+
+def test_limit_representations_by_bandwidth():
+    root = parse(rewrite_manifest(load('channels.mpd'), filters=[LimitRepresentations(max_bandwidth=3000000)]))
+
+    # Sets where every stream is over the limit keep their lowest one
+    assert representations(root) == [['v1', 'v2', 'v3'], ['u1'], ['a0', 'a1'], ['e0'], ['d0']]
+
+def test_limit_representations_by_height():
+    root = parse(rewrite_manifest(load('channels.mpd'), filters=[LimitRepresentations(max_height=720)]))
+
+    # The height of the UHD set is given on the AdaptationSet
+    assert representations(root) == [['v1', 'v2', 'v3'], ['u1'], ['a0', 'a1'], ['e0'], ['d0']]
+
+def test_set_base_url_inserts_after_program_information():
+    root = parse(rewrite_manifest(load('channels.mpd'), filters=[SetBaseURL(base_url='https://cdn.example.com/live/')]))
+
+    assert [child.tag for child in root][:3] == [NS + 'ProgramInformation', NS + 'BaseURL', NS + 'Period']
+    assert root.find(NS + 'BaseURL').text == 'https://cdn.example.com/live/'
+
+def test_set_base_url_resolves_existing():
+    root = parse(rewrite_manifest(load('base_url.mpd'), filters=[SetBaseURL(base_url='https://cdn.example.com/live/')]))
+
+    assert [base_url.text for base_url in root.findall(NS + 'BaseURL')] == ['https://cdn.example.com/live/dash/']
+
+def test_filters_combine_with_duration():
+    xml = rewrite_manifest(load('channels.mpd'), duration=1800, add_duration=0, filters=[DropCodecs(codecs=['ac-3']), LimitRepresentations(max_height=720)])
+    root = parse(xml)
+
+    assert xml.startswith('<?xml version="1.0" encoding="UTF-8"?>')
+    assert representations(root) == [['v1', 'v2', 'v3'], ['u1'], ['a1']]
+    assert root.get('mediaPresentationDuration') == 'PT0H30M0S'
@@ -0,0 +1,44 @@
+import threading, pytest, requests
+
+from resources.lib.base import proxy, settings
+from resources.lib.base.constants import PROXY_POOL_SIZE
+
+@pytest.fixture(scope='module')
+def server():
+    server = proxy.HTTPServer(None, ('127.0.0.1', 0), proxy.BaseHTTPRequestHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    yield 'http://127.0.0.1:{0}'.format(server.server_address[1])
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+def register(server, hostname):
+    return requests.post(server + '/_streams', json={'hostname': hostname, 'key': None, 'token': None}, timeout=5)
+
+def test_registers_origin(server):
+    response = register(server, 'https://stream.example.com')
+
+    assert response.status_code == 200
+    assert response.json()['stream_id'] == proxy.get_stream_id('https://stream.example.com')
+
+@pytest.mark.parametrize('hostname', ['https://stream.example.com/path', 'ftp://stream.example.com', 'https://user@stream.example.com', 'stream.example.com', '', None, 5])
+def test_rejects_anything_but_an_origin(server, hostname):
+    assert register(server, hostname).status_code == 400
+
+def test_rejects_other_clients(server, monkeypatch):
+    monkeypatch.setattr(proxy, 'is_loopback', lambda address: False)
+
+    assert register(server, 'https://stream.example.com').status_code == 403
+
+@pytest.mark.parametrize('address, expected', [('127.0.0.1', True), ('127.1.2.3', True), ('::1', True), ('::ffff:127.0.0.1', True), ('192.168.1.10', False), ('::ffff:192.168.1.10', False), ('fe80::1', False)])
+def test_is_loopback(address, expected):
+    assert proxy.is_loopback(address) == expected
+
+@pytest.mark.parametrize('value, expected', [(8, 8), (1, 1), (0, PROXY_POOL_SIZE), (-2, PROXY_POOL_SIZE)])
+def test_pool_size_setting(value, expected):
+    settings.setInt(key='proxy_pool_size', value=value)
+
+    assert proxy.get_pool_size() == expected
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import io, json, random, pytest
+
+from env import fixture
+from fuzzywuzzy import py_levenshtein
+
+# Results of python-Levenshtein 0.12.2 (the C extension) for the same pairs
+with io.open(fixture('levenshtein.json'), 'r', encoding='utf-8') as f:
+    CASES = json.load(f)
+
+def as_tuples(items):
+    return [tuple(item) for item in items]
+
+@pytest.mark.parametrize('case', CASES)
+def test_matches_c_extension(case):
+    s1, s2 = case['s1'], case['s2']
+    opcodes = py_levenshtein.opcodes(s1, s2)
+
+    assert py_levenshtein.distance(s1, s2) == case['distance']
+    assert py_levenshtein.ratio(s1, s2) == case['ratio']
+    assert as_tuples(py_levenshtein.editops(s1, s2)) == as_tuples(case['editops'])
+    assert as_tuples(opcodes) == as_tuples(case['opcodes'])
+    assert as_tuples(py_levenshtein.matching_blocks(opcodes, s1, s2)) == as_tuples(case['matching_blocks'])
+
+def test_matches_installed_c_extension():
+    Levenshtein = pytest.importorskip('Levenshtein')
+    rand = random.Random(0)
+
+    for _ in range(2000):
+        alphabet = rand.choice(['ab', 'abcdef', u'aeiou rst\xe9中', 'abcdefghijklmnopqrstuvwxyz '])
+        s1 = u''.join(rand.choice(alphabet) for _ in range(rand.randint(0, 90)))
+        s2 = u''.join(rand.choice(alphabet) for _ in range(rand.randint(0, 90)))
+        editops = Levenshtein.editops(s1, s2)
+
+        assert py_levenshtein.distance(s1, s2) == Levenshtein.distance(s1, s2)
+        assert py_levenshtein.ratio(s1, s2) == Levenshtein.ratio(s1, s2)
+        assert as_tuples(py_levenshtein.editops(s1, s2)) == as_tuples(editops)
+        assert as_tuples(py_levenshtein.opcodes(s1, s2)) == as_tuples(Levenshtein.opcodes(s1, s2))
+        assert as_tuples(py_levenshtein.matching_blocks(editops, s1, s2)) == as_tuples(Levenshtein.matching_blocks(editops, s1, s2))
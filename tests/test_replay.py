@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import io, json, os, subprocess, sys, pytest
+
+import env
+
+from resources.lib.base import replay
+from resources.lib.base.constants import ADDON_PROFILE, REPLAY_DB
+
+def write_titles(titles):
+    data = {}
+
+    for pos, title in enumerate(titles):
+        data.setdefault(title[0].upper(), {})[title.lower()] = {'orig': title, 'ids': ['p{0}'.format(pos)]}
+
+    with io.open(ADDON_PROFILE + 'list_replay.json', 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, ensure_ascii=False))
+
+def ingest_elsewhere():
+    # Like the service, in another process with its own replay module
+    script = 'import env; env.setup(); from resources.lib.base import replay; replay.ingest()'
+    subprocess.check_call([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)), env=dict(os.environ, KODI_PROFILE=ADDON_PROFILE))
+
+@pytest.fixture
+def catalogue():
+    yield
+
+    replay.close()
+
+    for file in (REPLAY_DB, 'list_replay.json'):
+        if os.path.isfile(ADDON_PROFILE + file):
+            os.remove(ADDON_PROFILE + file)
+
+def test_titles_index_normalized_title(catalogue):
+    write_titles([u'NOS Journaal', u'Wie is de Mol?', u'Café De Wereld'])
+    replay.ingest()
+
+    rows = replay._query('SELECT title FROM titles ORDER BY title')
+
+    assert [row[0] for row in rows] == [u'cafe de wereld', u'nos journaal', u'wie is de mol']
+    assert replay._query('EXPLAIN QUERY PLAN SELECT data FROM titles WHERE title = ?', (u'nos journaal',))[0][-1].endswith('USING INDEX titles_title (title=?)')
+
+def test_reopens_catalogue_replaced_by_another_process(catalogue):
+    write_titles([u'NOS Journaal'])
+    replay.ingest()
+
+    assert replay.count_titles() == 1
+
+    write_titles([u'NOS Journaal', u'Nieuwsuur', u'Tegenlicht'])
+    ingest_elsewhere()
+
+    assert replay.count_titles() == 3
+    assert [data['orig'] for pos, data in replay.get_titles(character='N')] == [u'Nieuwsuur', u'NOS Journaal']
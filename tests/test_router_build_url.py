@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import random, sys, pytest, reference
+
+from resources.lib.base import router
+from resources.lib.base.exceptions import RouterError
+
+VALUES = [None, 0, 1, -5, 3600, 2.5, True, False, '', 'abc', 'a b&c=d/é?', u'caf\xe9 中', '{"a": [1, 2]}', ['x', 1], {'k': 'v'}, ('t',), '+%20~._-', u'\xdcn\xefc\xf8d\xe9 ☃', b'bytes']
+KEYS = ['label', 'id', 'start', 'channel', 'ids', 'description', 'image', 'duration', 'type', '_is_live', 'character', 'day', 'series']
+URLS = ['play_video', '', '_settings', 'replaytv_item', u'vod_s\xe9ries']
+
+def build(function, *args, **kwargs):
+    try:
+        return function(*args, **kwargs)
+    except Exception as e:
+        return type(e)
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_urlencode(seed):
+    rand = random.Random(seed)
+
+    for _ in range(1000):
+        url = rand.choice(URLS)
+        kwargs = dict((key, rand.choice(VALUES)) for key in rand.sample(KEYS, rand.randint(0, len(KEYS))))
+
+        expected = build(reference.build_url, url, router.ADDON_ID, router.encode_obj, **dict(kwargs))
+        result = build(router.build_url, url, **dict(kwargs))
+
+        assert result == expected and type(result) == type(expected), (url, kwargs)
+
+def test_url_for_func():
+    def replaytv_item(**kwargs):
+        pass
+
+    def other(**kwargs):
+        pass
+
+    router.add(None, replaytv_item)
+    router.add('replaytv_alias', replaytv_item)
+
+    assert router.url_for_func(replaytv_item, id=1, label='x') == 'plugin://{0}/?_=replaytv_item&id=1&label=x'.format(router.ADDON_ID)
+
+    with pytest.raises(RouterError):
+        router.url_for_func(other)
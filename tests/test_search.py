@@ -0,0 +1,68 @@
+import io, os, pytest
+
+from env import fixture
+from fuzzywuzzy import fuzz
+from resources.lib.base import search
+from resources.lib.base.constants import ADDON_PROFILE, REPLAY_DB
+
+with io.open(fixture('titles.txt'), 'r', encoding='utf-8') as f:
+    TITLES = [line.strip() for line in f if line.strip()]
+
+CHOICES = list(enumerate(title + u' (ReplayTV)' for title in TITLES))
+
+@pytest.fixture
+def catalogue():
+    path = ADDON_PROFILE + REPLAY_DB
+
+    with open(path, 'wb') as f:
+        f.write(b'catalogue')
+
+    search._prepared.clear()
+    yield path
+    os.remove(path)
+
+def brute_force(query, limit=None):
+    # Every title scored with the plain fuzz functions, best first and earlier titles first on ties
+    matches = []
+
+    for key, label in CHOICES:
+        scores = (fuzz.token_set_ratio(query, label), fuzz.partial_ratio(query, label), fuzz.token_sort_ratio(query, label))
+
+        if sum(scores) > 160:
+            matches.append((label, scores, key))
+
+    matches.sort(key=lambda match: sum(match[1]), reverse=True)
+
+    return matches[:limit] if limit else matches
+
+@pytest.mark.parametrize('query', [u'journaal', u'wie is de mol', u'formule 1', u'klokhuis', u'voetbal'])
+@pytest.mark.parametrize('limit', [None, 51, 2])
+def test_prepared_choices_give_same_matches(catalogue, query, limit):
+    expected = brute_force(query, limit=limit)
+
+    assert search.get_matches(query=query, choices=CHOICES, limit=limit, source='replay') == expected
+    assert search.get_matches(query=query, choices=CHOICES, limit=limit, source='replay') == expected
+
+def test_prepared_choices_are_reused(catalogue):
+    search.get_matches(query=u'journaal', choices=CHOICES, source='replay')
+    prepared = search._get_prepared('replay')
+    processed = prepared[CHOICES[0][1]]
+
+    search.get_matches(query=u'nieuws', choices=CHOICES[:10], source='replay')
+
+    assert search._get_prepared('replay') is prepared
+    assert prepared[CHOICES[0][1]] is processed
+    assert len(prepared) == len(CHOICES)
+
+def test_prepared_choices_dropped_when_catalogue_changes(catalogue):
+    search.get_matches(query=u'journaal', choices=CHOICES, source='replay')
+    prepared = search._get_prepared('replay')
+
+    with open(catalogue, 'ab') as f:
+        f.write(b' updated')
+
+    assert search._get_prepared('replay') is not prepared
+    assert search._get_prepared('replay') == {}
+
+def test_unknown_source_is_not_cached():
+    assert search._get_prepared(None) is None
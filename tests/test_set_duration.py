@@ -0,0 +1,24 @@
+import io, os, pytest, reference
+
+from env import fixture
+from resources.lib.base.util import set_duration
+
+MPDS = sorted(os.listdir(fixture('mpd')))
+
+def load(name):
+    with io.open(fixture('mpd', name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize('name', MPDS)
+@pytest.mark.parametrize('duration', [0, 30, 600, 3600, 5400, 200000])
+@pytest.mark.parametrize('add_duration', [0, 900])
+def test_matches_reference(name, duration, add_duration):
+    xml = load(name)
+
+    assert set_duration(xml, duration=duration, add_duration=add_duration) == reference.set_duration(xml, duration=duration, add_duration=add_duration)
+
+def test_shortens_presentation():
+    xml = set_duration(load('replay_hours.mpd'), duration=1800, add_duration=900)
+
+    assert 'mediaPresentationDuration="PT0H45M0S"' in xml
+    assert 'duration="PT0H45M0S">' in xml
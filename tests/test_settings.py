@@ -0,0 +1,29 @@
+import xbmcaddon
+
+from resources.lib.base import router, settings
+
+def test_dispatch_reads_values_written_elsewhere():
+    seen = []
+
+    def settings_probe(**kwargs):
+        seen.append(settings.get('_user_agent'))
+
+    router.add(None, settings_probe)
+    xbmcaddon.SETTINGS['_user_agent'] = 'first'
+    router.dispatch('?_=settings_probe')
+
+    # Written by the service or the settings dialog while the invoker is idle
+    xbmcaddon.SETTINGS['_user_agent'] = 'second'
+    router.dispatch('?_=settings_probe')
+
+    assert seen == ['first', 'second']
+
+def test_values_cached_within_a_dispatch():
+    xbmcaddon.SETTINGS['_img_size'] = '400x225'
+    settings.invalidate()
+
+    assert settings.get('_img_size') == '400x225'
+
+    xbmcaddon.SETTINGS['_img_size'] = '1920x1080'
+
+    assert settings.get('_img_size') == '400x225'
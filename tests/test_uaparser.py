@@ -0,0 +1,32 @@
+import io, json, sys, pytest
+
+from env import fixture
+from resources.lib.base import uaparser
+
+# Results of uaparser before the detectors were precompiled, for real user agents and truncated ones.
+# Detectors used to run in dict order, so a few agents had different results under Python 2
+with io.open(fixture('user_agents.json'), 'r', encoding='utf-8') as f:
+    CASES = json.load(f)
+
+if sys.version_info < (3, 0):
+    for case in CASES:
+        case.update(case.pop('python2', {}))
+
+@pytest.mark.parametrize('case', CASES)
+def test_matches_previous_results(case):
+    agent = str(case['agent'])
+
+    assert uaparser._detect(agent) == case['detect']
+    assert uaparser._detect(agent, fill_none=True) == case['detect_fill_none']
+    assert uaparser.detect(agent) == case['detect']
+    assert uaparser.detect(agent, fill_none=True) == case['detect_fill_none']
+    assert list(uaparser.simple_detect(agent)) == case['simple_detect']
+
+def test_cached_result_is_a_copy():
+    agent = str(CASES[0]['agent'])
+
+    result = uaparser.detect(agent)
+    result['browser']['name'] = 'changed'
+    result['extra'] = True
+
+    assert uaparser.detect(agent) == CASES[0]['detect']
@@ -0,0 +1,144 @@
+# Times Folder.display() on replay-style listings, for the tree before directory items were submitted in one call and
+# for the current tree. Each tree runs in its own process, the old one is exported from git, pass another revision
+# with --baseline. The stubbed Kodi calls can be given a cost to stand in for the round trip to Kodi
+#
+#   python tools/bench/bench_folder_display.py [--items N] [--call-cost US] [--baseline REV]
+
+import argparse, gc, json, os, shutil, subprocess, sys, tarfile, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests'))
+
+import env
+
+ADDON_ID = 'plugin.video.kpn'
+
+class InputstreamStub(object):
+    manifest_type = 'mpd'
+    license_type = 'com.widevine.alpha'
+    license_key = 'http://license.example/widevine'
+    content_type = 'application/octet-stream'
+    challenge = 'R{SSM}'
+    response = ''
+    mimetype = 'application/dash+xml'
+    media_renewal_url = None
+    media_renewal_time = None
+
+    def check(self):
+        return True
+
+def add_cost(module, names, cost, calls):
+    def wrap(name, function):
+        def call(*args, **kwargs):
+            calls[name] = calls.get(name, 0) + 1
+            end = time.time() + cost
+
+            while time.time() < end:
+                pass
+
+            return function(*args, **kwargs)
+
+        return call
+
+    for name in names:
+        setattr(module, name, wrap(name, getattr(module, name)))
+
+def measure(args):
+    env.setup(ADDON_ID)
+    sys.path.insert(0, args.addon)
+
+    import xbmc, xbmcplugin
+    from resources.lib.base import plugin
+
+    calls = {}
+    add_cost(xbmcplugin, ['addDirectoryItem', 'addDirectoryItems', 'endOfDirectory', 'setContent', 'setPluginCategory', 'addSortMethod'], args.call_cost / 1000000.0, calls)
+    add_cost(xbmc, ['getInfoLabel'], args.call_cost / 1000000.0, calls)
+
+    def build(inputstream):
+        folder = plugin.Folder(title='Replay')
+
+        for i in range(args.items):
+            folder.add_item(
+                label = 'Programme title {0}'.format(i),
+                info = {'plot': 'Description {0}'.format(i), 'duration': 3600, 'mediatype': 'video'},
+                art = {'thumb': 'http://images.example/{0}.jpg'.format(i), 'fanart': 'http://images.example/{0}_l.jpg'.format(i)},
+                path = plugin.url_for(func_or_url='play_video', type='program', channel='ch{0}'.format(i), id=str(i), duration=3600, _is_live=False),
+                playable = True,
+                context = [('Watchlist', 'RunPlugin(plugin://{0}/?id={1})'.format(ADDON_ID, i))],
+                properties = {'fuzz_total': i},
+                inputstream = InputstreamStub() if inputstream else None,
+                headers = {'User-Agent': 'Mozilla/5.0'} if inputstream else None,
+            )
+
+        return folder
+
+    results = {}
+
+    for inputstream in (False, True):
+        best = None
+
+        for _ in range(args.repeat):
+            folder = build(inputstream)
+            calls.clear()
+            del xbmcplugin.ITEMS[:]
+
+            # Like timeit, collections are kept out of the measurement
+            gc.collect()
+            gc.disable()
+
+            start = time.time()
+            folder.display()
+            elapsed = time.time() - start
+
+            gc.enable()
+
+            best = elapsed if best is None else min(best, elapsed)
+
+        results['inputstream' if inputstream else 'plain'] = {'ms': best * 1000, 'calls': dict(calls)}
+
+    print(json.dumps(results))
+
+def export(revision, directory):
+    path = '{0}/{1}'.format(os.path.basename(env.TREE), ADDON_ID)
+    archive = os.path.join(directory, 'baseline.tar')
+
+    with open(archive, 'wb') as f:
+        subprocess.check_call(['git', 'archive', '--format=tar', revision, path], cwd=env.ROOT, stdout=f)
+
+    with tarfile.open(archive) as tar:
+        tar.extractall(directory)
+
+    return os.path.join(directory, path)
+
+def run(args, name, addon):
+    command = [sys.executable, os.path.abspath(__file__), '--measure', '--addon', addon, '--items', str(args.items), '--repeat', str(args.repeat), '--call-cost', str(args.call_cost)]
+    results = json.loads(subprocess.check_output(command).decode('utf-8').strip().splitlines()[-1])
+
+    for kind in ('plain', 'inputstream'):
+        calls = ', '.join('{0} {1}'.format(call, count) for call, count in sorted(results[kind]['calls'].items()))
+        print('{0:<10} {1:<12} {2:>8.1f} ms   {3}'.format(name, kind, results[kind]['ms'], calls))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=600)
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--call-cost', type=float, default=20, help='microseconds spent in every stubbed Kodi call')
+    parser.add_argument('--baseline', default='0c1f08c^')
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--addon', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        return measure(args)
+
+    print('{0} items, {1:g} us per Kodi call, best of {2}\n'.format(args.items, args.call_cost, args.repeat))
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        run(args, args.baseline, export(args.baseline, directory))
+        run(args, 'current', os.path.join(env.TREE, ADDON_ID))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
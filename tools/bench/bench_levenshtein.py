@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Times the fuzzywuzzy scorers on title-length strings with each SequenceMatcher backend:
+# difflib, StringMatcher on py_levenshtein and, when it is installed, StringMatcher on the C extension
+#
+#   python tools/bench/bench_levenshtein.py [--number N]
+
+import argparse, difflib, io, os, sys, timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests'))
+
+import env
+
+# The add-on reads its own arguments from sys.argv
+ARGV = sys.argv[1:]
+env.setup()
+
+from fuzzywuzzy import StringMatcher, fuzz, py_levenshtein
+
+FUNCTIONS = ['distance', 'editops', 'matching_blocks', 'opcodes', 'ratio']
+QUERIES = [u'journaal', u'wie is de mol', u'formule 1', u'planet', u'klokhuis', u'de slimste', u'voetbal inside', u'nos']
+SCORERS = ['ratio', 'partial_ratio', 'token_sort_ratio', 'token_set_ratio', 'WRatio']
+
+def use_backend(module):
+    for name in FUNCTIONS:
+        setattr(StringMatcher, name, getattr(module, name))
+
+def run(titles):
+    return [[getattr(fuzz, scorer)(query, title) for query in QUERIES for title in titles] for scorer in SCORERS]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=5)
+    args = parser.parse_args(ARGV)
+
+    with io.open(env.fixture('titles.txt'), 'r', encoding='utf-8') as f:
+        titles = [line.strip() for line in f if line.strip()]
+
+    backends = [('difflib', difflib.SequenceMatcher, None), ('py_levenshtein', StringMatcher.StringMatcher, py_levenshtein)]
+
+    try:
+        import Levenshtein
+    except ImportError:
+        print('Levenshtein C extension not installed, skipping it')
+    else:
+        backends.append(('Levenshtein (C)', StringMatcher.StringMatcher, Levenshtein))
+
+    print('{0} queries x {1} titles per scorer, ms per pass\n'.format(len(QUERIES), len(titles)))
+    print('{0:<18}'.format('backend') + ''.join('{0:>18}'.format(scorer) for scorer in SCORERS))
+
+    results = {}
+
+    for name, matcher, module in backends:
+        fuzz.SequenceMatcher = matcher
+
+        if module:
+            use_backend(module)
+
+        results[name] = run(titles)
+        times = []
+
+        for scorer in SCORERS:
+            function = getattr(fuzz, scorer)
+            seconds = timeit.timeit(lambda: [function(query, title) for query in QUERIES for title in titles], number=args.number) / args.number
+            times.append(seconds * 1000)
+
+        print('{0:<18}'.format(name) + ''.join('{0:>18.1f}'.format(value) for value in times))
+
+    if 'Levenshtein (C)' in results:
+        print('\nscores identical to the C extension: {0}'.format(results['py_levenshtein'] == results['Levenshtein (C)']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Times set_duration against the implementation it replaced on the MPD fixtures
+#
+#   python tools/bench/bench_set_duration.py [--number N]
+
+import argparse, io, os, sys, timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests'))
+
+import env
+
+# The add-on reads its own arguments from sys.argv
+ARGV = sys.argv[1:]
+env.setup()
+
+import reference
+
+from resources.lib.base.util import set_duration
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=50)
+    parser.add_argument('--duration', type=int, default=1800)
+    parser.add_argument('--add-duration', type=int, default=900)
+    args = parser.parse_args(ARGV)
+
+    print('{0:<28} {1:>8} {2:>10} {3:>10} {4:>8}'.format('manifest', 'KB', 'old ms', 'new ms', 'speedup'))
+
+    for name in sorted(os.listdir(env.fixture('mpd'))):
+        with io.open(env.fixture('mpd', name), 'r', encoding='utf-8') as f:
+            xml = f.read()
+
+        if set_duration(xml, duration=args.duration, add_duration=args.add_duration) != reference.set_duration(xml, duration=args.duration, add_duration=args.add_duration):
+            print('{0}: output differs from the reference'.format(name))
+            sys.exit(1)
+
+        old = timeit.timeit(lambda: reference.set_duration(xml, duration=args.duration, add_duration=args.add_duration), number=args.number) / args.number
+        new = timeit.timeit(lambda: set_duration(xml, duration=args.duration, add_duration=args.add_duration), number=args.number) / args.number
+
+        print('{0:<28} {1:>8} {2:>10.3f} {3:>10.3f} {4:>7.1f}x'.format(name, len(xml) // 1024, old * 1000, new * 1000, old / new))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Times uaparser.detect against the version before the detectors were precompiled, on the user agent corpus.
+# The old version is read from git, pass another revision with --baseline
+#
+#   python tools/bench/bench_uaparser.py [--number N] [--baseline REV]
+
+import argparse, io, json, os, shutil, subprocess, sys, tempfile, timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests'))
+
+import env
+
+# The add-on reads its own arguments from sys.argv
+ARGV = sys.argv[1:]
+env.setup()
+
+from resources.lib.base import uaparser
+
+def load_baseline(revision):
+    path = '{0}/plugin.video.kpn/resources/lib/base/uaparser.py'.format(os.path.basename(env.TREE))
+    source = subprocess.check_output(['git', 'show', '{0}:{1}'.format(revision, path)], cwd=env.ROOT)
+
+    # Imported from a file like the add-on does, the old detector order follows the module globals
+    directory = tempfile.mkdtemp()
+
+    try:
+        with open(os.path.join(directory, 'uaparser_baseline.py'), 'wb') as f:
+            f.write(source)
+
+        sys.path.insert(0, directory)
+        sys.dont_write_bytecode = True
+
+        return __import__('uaparser_baseline')
+    finally:
+        sys.path.remove(directory)
+        shutil.rmtree(directory)
+
+def per_agent(function, agents, number):
+    return timeit.timeit(lambda: [function(agent) for agent in agents], number=number) / number / len(agents) * 1000000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--baseline', default='eb88351^')
+    args = parser.parse_args(ARGV)
+
+    with io.open(env.fixture('user_agents.json'), 'r', encoding='utf-8') as f:
+        agents = [str(case['agent']) for case in json.load(f)]
+
+    baseline = load_baseline(args.baseline)
+
+    for agent in agents:
+        for fill_none in (False, True):
+            if uaparser.detect(agent, fill_none) != baseline.detect(agent, fill_none):
+                print('{0}: result differs from the baseline'.format(agent))
+                sys.exit(1)
+
+    print('{0} user agents, results identical to {1}\n'.format(len(agents), args.baseline))
+
+    # update_os_browser() used to call detect() four times on the same agent
+    def update_os_browser(module):
+        return lambda agent: [module.detect(agent).get('browser'), module.detect(agent).get('browser'), module.detect(agent).get('os'), module.detect(agent).get('os')]
+
+    rows = [
+        ('old detect', per_agent(baseline.detect, agents, args.number)),
+        ('new detect, uncached', per_agent(uaparser._detect, agents, args.number)),
+        ('new detect, cached', per_agent(uaparser.detect, agents, args.number)),
+        ('old update_os_browser', per_agent(update_os_browser(baseline), agents, args.number // 4 or 1)),
+        ('new update_os_browser', per_agent(lambda agent: uaparser.detect(agent).get('browser'), agents, args.number // 4 or 1)),
+    ]
+
+    for name, microseconds in rows:
+        print('{0:<24} {1:>8.1f} us per agent'.format(name, microseconds))
+
+if __name__ == '__main__':
+    main()